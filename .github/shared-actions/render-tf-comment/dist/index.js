@@ -31773,11 +31773,21 @@ function formatAttrs(values, attrs) {
   });
 }
 
-function renderOutputs(outputsCfg, state, completions) {
+// Reads the table written by scripts/tfstate_projection.py: the configured
+// columns plus one row per resource, with only those attributes.
+function loadOutputsTable(outputsPath) {
+  const table = JSON.parse(fs.readFileSync(outputsPath, 'utf8'));
+  if (!table || typeof table.columns !== 'object' || !Array.isArray(table.rows)) {
+    throw new Error(`${outputsPath} is not an outputs table`);
+  }
+  return table;
+}
+
+function renderOutputs(outputsCfg, resources, completions) {
   // Only render resources that were actually applied in this run, identified
   // by the presence of a Creation/Modifications/Destruction completion line.
   const blocks = [];
-  for (const { address, type, values } of iterResources(state)) {
+  for (const { address, type, values } of resources) {
     if (!(address in completions)) continue;
     const attrs = outputsCfg[type];
     if (!attrs) continue;
@@ -31888,13 +31898,18 @@ function main() {
     } else {
       const configPath = core.getInput('config_path') || '.terraform-ci.yaml';
       const statePath = core.getInput('state_path');
+      const outputsPath = core.getInput('outputs_path');
 
       let outputs = '';
-      if (statePath && fs.existsSync(statePath)) {
+      if (outputsPath && fs.existsSync(outputsPath)) {
+        const table = loadOutputsTable(outputsPath);
+        const completions = parseCompletionLines(consoleText);
+        outputs = renderOutputs(table.columns, table.rows, completions);
+      } else if (statePath && fs.existsSync(statePath)) {
         const state = JSON.parse(fs.readFileSync(statePath, 'utf8'));
         const outputsCfg = loadOutputsConfig(configPath);
         const completions = parseCompletionLines(consoleText);
-        outputs = renderOutputs(outputsCfg, state, completions);
+        outputs = renderOutputs(outputsCfg, iterResources(state), completions);
       }
 
       body = buildApplyBody({ directory, runUrl, duration, cmd, summary, cleanConsole, outputs });
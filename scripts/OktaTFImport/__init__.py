@@ -1,11 +1,61 @@
+import os
 import sys
-import json
+import time
+import asyncio
+import inspect
+import importlib
 from pathlib import Path
-from okta.client import Client as OktaClient
-from ._utils import terraform_import_block
+from ._utils import terraform_import_block, replace_if_changed, ImportNamer
+from ._paginator import OktaPaginator, prefetch
+from ._checkpoint import ImportCheckpoint
+from ._state import StateIndex, managed_resources
+from ._cache import EntityCache, PROBE_MAX_AGE_SECONDS
+from ._metrics import ImportMetrics
+from ._drift import DriftIndex
+from ._waves import WaveManifest, WAVE_FILE_GLOB, read_import_blocks
 from ._users import _get_all_users, _existing_users
 from ._groups import _get_all_groups, _existing_groups
 from ._applications import _get_all_apps, _existing_apps
+from ._memberships import _get_all_memberships, _existing_memberships
+from ._group_rules import _get_all_group_rules, _existing_group_rules
+from ._app_users import _get_all_app_users, _existing_app_users
+
+# Local entity cache used by incremental imports, kept in the environment directory
+CACHE_FILE = ".okta-import-cache.sqlite"
+
+# Resource types the importer can process, keyed by their CLI name
+FETCHERS = {}
+
+def register_fetcher(name: str, description: str, getter_fn, existing_fn, delta: bool = False,
+                     probes: bool = False, drift: dict | None = None):
+    """Make a resource type available to OktaTFImport.process() and the CLI.
+
+    getter_fn is an async generator yielding (import records, next cursor)
+    pages; existing_fn accepts a terraform resource type and returns True if
+    state resources of that type count as already imported. delta marks
+    fetchers that accept a `since` lastUpdated filter for incremental runs;
+    probes marks fetchers that accept a `probes` ProbeCache to reuse
+    per-entity probe results between incremental runs. drift, for fetchers
+    whose records carry live `attributes` to compare with state, holds the
+    extra getter arguments for a drift check (None: drift not supported).
+    """
+    FETCHERS[name] = {
+        "description": description,
+        "getter": getter_fn,
+        "existing": existing_fn,
+        "delta": delta,
+        "probes": probes,
+        "drift": drift,
+    }
+
+register_fetcher("groups", "Okta groups", _get_all_groups, _existing_groups, delta=True, drift={})
+register_fetcher("users", "Okta users", _get_all_users, _existing_users, delta=True, drift={})
+# Group assignments are not compared, so drift checks skip the per-app probes
+register_fetcher("apps", "Okta applications", _get_all_apps, _existing_apps, probes=True,
+                 drift={"assignments": False})
+register_fetcher("memberships", "Okta group memberships", _get_all_memberships, _existing_memberships)
+register_fetcher("group_rules", "Okta group rules", _get_all_group_rules, _existing_group_rules)
+register_fetcher("app_users", "Okta application user assignments", _get_all_app_users, _existing_app_users)
 
 class OktaTFImport:
     _instance = None  # Class variable to store the single instance
@@ -17,62 +67,262 @@ class OktaTFImport:
         # Always return the existing instance
         return cls._instance
 
-    def __init__(self, directory: str, config: dict, state_file: str):
+    def __init__(self, directory: str, config: dict, max_concurrency: int = 4,
+                 incremental: bool = False, full_reconcile: bool = False, waves: bool = False):
         if not hasattr(self, '_initialized'):  # Prevent re-initialization
             self._initialized = True
 
             self.client = None
+            self.paginator = None
             self.state = {}
+            self.index = None
+            self.namer = None
+            self._index_ready = None
+            self.cache = None
+            self.failed = set()
+            self.waves = waves
+            self.config = config
+            self.metrics = ImportMetrics()
+            self.full_reconcile = full_reconcile
             self.directory = directory
 
             self.output_dir = Path(self.directory)
-            self._setup_client(config)
-            self._read_state(state_file)
+            self.index = StateIndex()
+            self.namer = ImportNamer(self.index.names())
+            if incremental:
+                self.cache = EntityCache(self.output_dir / CACHE_FILE)
+
+            # Shared across every fetcher so concurrent crawls never have more
+            # than max_concurrency requests in flight against the Okta API.
+            # Its client is set by _ensure_client() when the first fetch begins.
+            self.paginator = OktaPaginator(None, max_concurrency=max_concurrency, metrics=self.metrics)
+
+    def _ensure_client(self):
+        """Create the Okta client on first use.
+
+        Importing the SDK (with its models and HTTP stack) is most of the CLI's
+        startup time, so it is deferred until a fetch actually begins; --help,
+        argument errors and missing tfvars never load it.
+        """
+        if self.client is None:
+            self._setup_client(self.config)
+            self.paginator.client = self.client
 
     def _setup_client(self, config):
+        from okta.client import Client as OktaClient
+
+        if config.get("orgUrl", "").startswith("http://"):
+            # Local stand-in orgs (see okta_fake_server.py) are served over plain HTTP;
+            # the SDK only reads this testing switch from its environment config
+            os.environ.setdefault("OKTA_TESTING_TESTINGDISABLEHTTPSCHECK", "true")
+        # OktaPaginator retries 429/5xx itself with the rate-limit budget in view;
+        # SDK-level retries would also hide the extra requests from the metrics
+        config = {**config, "rateLimit": {"maxRetries": 0, **config.get("rateLimit", {})}}
         try:
             self.client = OktaClient(config)
         except Exception as e:  # noqa: BLE001
             raise ValueError(f"Error configuring Okta client: {e}")
         
-    def _read_state(self, state_file):
-        # Read the state file and return the json
+    async def _load_state(self, state, resource_types: list[str]):
+        """Build the state index once the terraform state is available.
+
+        state may be the `terraform show -json` document or an awaitable that
+        resolves to it, so the Okta crawls can start while it is still exporting.
+        """
+        try:
+            if inspect.isawaitable(state):
+                state = await state
+            self.state = state or {}
+        except Exception as e:  # noqa: BLE001
+            print(f"Error reading terraform state: {e}", file=sys.stderr)
+            self.state = {}
+        self.index = StateIndex(self.state)
+
+        # Import blocks in files this run does not regenerate count as already managed;
+        # with waves, the wave file is regenerated from the per-type files too
+        exclude = {self.output_dir / f"{t}.import.tf" for t in resource_types}
+        if self.waves:
+            exclude.update(self.output_dir.glob(WAVE_FILE_GLOB))
+        pending = self.index.add_import_files(self.output_dir, exclude=exclude)
+        if pending:
+            print(f"Found {pending} import blocks already pending in existing import files")
+        self.namer = ImportNamer(self.index.names())
+
+    async def _wait_for_state(self, name: str):
+        if self._index_ready:
+            started = time.perf_counter()
+            await self._index_ready
+            self.metrics.add(name, "state_wait_seconds", time.perf_counter() - started)
+
+    async def _timed_pages(self, name: str, pages):
+        """Pass pages through, recording page and record counts and the time spent waiting on them."""
+        iterator = aiter(pages)
+        while True:
+            started = time.perf_counter()
+            try:
+                resources, cursor = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                self.metrics.add(name, "fetch_wait_seconds", time.perf_counter() - started)
+            self.metrics.add(name, "pages", 1)
+            self.metrics.add(name, "records", len(resources))
+            yield resources, cursor
+
+    def _record_timing(self, name: str, started: float, written: int, skipped: int):
+        """Record totals for one resource type; time not spent waiting counts as local processing."""
+        stats = self.metrics.types[name]
+        total = time.perf_counter() - started
+        stats["total_seconds"] += total
+        stats["process_seconds"] += max(total - stats["fetch_wait_seconds"] - stats["state_wait_seconds"], 0.0)
+        stats["written"] += written
+        stats["skipped"] += skipped
+
+    def _write_imports(self, name, records, skip) -> tuple[int, int]:
+        """Write import blocks for records not in skip ({type: ids}); returns (written, skipped).
+
+        The import file is left untouched if its contents would not change.
+        """
+        written = skipped = 0
+        output_file = self.output_dir / f"{name}.import.tf"
+        tmp_file = output_file.with_suffix(".tf.tmp")
+        with open(tmp_file, 'w') as f:
+            f.write(f"# Terraform import blocks for Okta {name}\n")
+            f.write("# Generated by import.py\n\n")
+
+            for r in records:
+                if r['id'] in skip.get(r['type'], ()):
+                    skipped += 1
+                    continue
+
+                resource_name = self.namer.name(r['type'], r['name'], r['id'])
+                f.write(terraform_import_block(r['type'], resource_name, r['id']))
+                written += 1
+        if not replace_if_changed(tmp_file, output_file):
+            print(f"{output_file} is unchanged")
+        return written, skipped
+
+    async def _register_cached(self, name, getter_fn, existing_fn, delta, probes=False):
+        """Refresh the entity cache for one resource type, then write its import file.
+
+        Only entities changed since the cached high-water mark are fetched,
+        unless a full reconcile is due (or forced), which also drops entities
+        deleted in Okta. The import file is regenerated from the cache.
+        """
+        output_file = self.output_dir / f"{name}.import.tf"
+        started = time.perf_counter()
+        written = skipped = 0
+
         try:
-            with open(state_file, 'r') as f:
-                self.state = json.load(f)
+            run = self.cache.begin(name, force_full=self.full_reconcile, delta=delta)
+            if run['cursor']:
+                print(f"Resuming cached {name} crawl")
+            elif run['full']:
+                print(f"Running full {name} reconcile")
+
+            kwargs = {'since': run['since']} if run['since'] else {}
+            if probes:
+                # A forced full reconcile re-probes everything
+                kwargs['probes'] = self.cache.probes(name, 0 if self.full_reconcile else PROBE_MAX_AGE_SECONDS)
+            fetched = 0
+            pages = getter_fn(paginator=self.paginator, after=run['cursor'], **kwargs)
+            async for resources, cursor in self._timed_pages(name, pages):
+                self.cache.add_page(name, resources, run, cursor)
+                fetched += len(resources)
+            removed = self.cache.finish(name, run)
+
+            await self._wait_for_state(name)
+
+            written, skipped = self._write_imports(name, self.cache.records(name), self.index.ids(existing_fn))
+            print(f"Written {written} {name} import blocks to {output_file} "
+                  f"({fetched} fetched, {removed} removed from cache, skipped {skipped} already in state)")
         except Exception as e:
-            print(f"Error reading state file: {e}", file=sys.stderr)
-            return {}
+            self.failed.add(name)
+            print(f"Error processing {name}: {str(e)}", file=sys.stderr)
+        finally:
+            self._record_timing(name, started, written, skipped)
 
-    async def _register(self, name, getter_fn, existing_fn):
-        written = 0
-        skip = []
+    async def _register(self, name, getter_fn, existing_fn, delta=False, probes=False):
+        """Stream import blocks for one resource type into its import file.
+
+        Blocks are appended to a .partial file and flushed page by page, with a
+        checkpoint after each page. An interrupted run resumes from the saved
+        cursor; the partial file only replaces the import file once the crawl
+        has finished, so terraform never sees an incomplete file.
+        """
+        if self.cache:
+            return await self._register_cached(name, getter_fn, existing_fn, delta, probes)
+
+        output_file = self.output_dir / f"{name}.import.tf"
+        partial_file = output_file.with_suffix(".tf.partial")
+        checkpoint = ImportCheckpoint(self.output_dir, name)
+        pages = None
+        started = time.perf_counter()
+        written = skipped = 0
 
         try:
-            resources = await getter_fn(client=self.client)
+            resuming = checkpoint.load() and partial_file.exists()
+            if not resuming:
+                checkpoint = ImportCheckpoint(self.output_dir, name)
+            pages = prefetch(getter_fn(paginator=self.paginator, after=checkpoint.cursor))
 
-            # filter the state for existing resources
-            existing_ids = list(filter(existing_fn, self.state.get('values', {}).get('root_module', {}).get('resources', [])))
-            skip = [r['values']['id'] for r in existing_ids 
-                           if r.get('values').get('id') and len(r['values']) > 0]
+            # The first pages are fetched in the background while the state export finishes;
+            # ids already in state (or pending import elsewhere) for this resource type
+            await self._wait_for_state(name)
+            skip = self.index.ids(existing_fn)
 
-            output_file = self.output_dir / f"{name}.import.tf"
-            with open(output_file, 'w') as f:
+            if resuming:
+                print(f"Resuming {name} import after {checkpoint.written} blocks")
+                f = open(partial_file, 'r+')
+                f.truncate(checkpoint.offset)
+                f.seek(checkpoint.offset)
+            else:
+                f = open(partial_file, 'w')
                 f.write(f"# Terraform import blocks for Okta {name}\n")
                 f.write("# Generated by import.py\n\n")
 
-                for r in resources:
-                    if r['id'] in skip:
-                        continue
+            written, skipped = checkpoint.written, checkpoint.skipped
+            with f:
+                async for resources, cursor in self._timed_pages(name, pages):
+                    for r in resources:
+                        if r['id'] in skip.get(r['type'], ()) or r.get('deleted'):
+                            skipped += 1
+                            continue
+
+                        resource_name = self.namer.name(r['type'], r['name'], r['id'])
+                        f.write(terraform_import_block(r['type'], resource_name, r['id']))
+                        written += 1
 
-                    f.write(terraform_import_block(r['type'], r['name'], r['id']))
-                    written += 1
-                
-            print(f"Written {written} {name} import blocks to {output_file} (skipped {len(skip)} already in state)")
+                    f.flush()
+                    if cursor:
+                        checkpoint.save(cursor, written, skipped, f.tell())
+
+            if not replace_if_changed(partial_file, output_file):
+                print(f"{output_file} is unchanged")
+            checkpoint.clear()
+
+            print(f"Written {written} {name} import blocks to {output_file} (skipped {skipped} already in state)")
         except Exception as e:
-            print(f"Error processing users: {str(e)}", file=sys.stderr)
+            self.failed.add(name)
+            print(f"Error processing {name}: {str(e)}", file=sys.stderr)
+            if checkpoint.cursor:
+                print(f"Progress saved to {checkpoint.path}; re-run to resume the {name} import", file=sys.stderr)
+        finally:
+            if pages:
+                await pages.aclose()
+            self._record_timing(name, started, written, skipped)
 
     # ---------------- Public API -----------------
+    async def connect(self):
+        """Create the Okta client, importing the SDK in a worker thread.
+
+        process() and drift() call this first; the thread lets a state export
+        that is already scheduled get started while the SDK loads.
+        """
+        if self.client is None:
+            await asyncio.to_thread(importlib.import_module, "okta.client")
+        self._ensure_client()
+
     async def close(self):
         if self.client and hasattr(self.client, "close"):
             await self.client.close()
@@ -80,12 +330,105 @@ class OktaTFImport:
             if hasattr(self.client._http_client, "close"):
                 await self.client._http_client.close()
         self.client = None
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+
+    async def process(self, resource_types: list[str], state=None):
+        """Fetch and write every requested resource type concurrently.
+
+        state is the `terraform show -json` document, or an awaitable for it;
+        fetching starts immediately and import blocks are written once it resolves.
+        """
+        resource_types = list(dict.fromkeys(resource_types))
+        self._index_ready = asyncio.ensure_future(self._load_state(state, resource_types))
+        await self.connect()
+
+        # Each type writes its own file, so completion order does not affect output;
+        # duplicates were dropped above so two tasks never write the same file
+        await asyncio.gather(*(self.process_type(t) for t in resource_types))
+        await self._index_ready
+        self.metrics.finish()
+
+    async def drift(self, resource_types: list[str], state) -> dict:
+        """Compare live Okta objects with the terraform state, per resource type.
+
+        Each type is crawled with the same paged list calls as an import and
+        checked against a hashed index of the state values page by page.
+        state may be awaitable, as in process(); unlike an import, a failed
+        state export is raised rather than treated as an empty state.
+        Returns {type: {managed, unmanaged, deleted, modified}}.
+        """
+        state_ready = asyncio.ensure_future(state) if inspect.isawaitable(state) else None
+        await self.connect()
+
+        async def check(name):
+            fetcher = FETCHERS[name]
+            started = time.perf_counter()
+            pages = prefetch(fetcher["getter"](paginator=self.paginator, **fetcher["drift"]))
+            try:
+                index = DriftIndex(await state_ready if state_ready else state, fetcher["existing"])
+                async for resources, _ in self._timed_pages(name, pages):
+                    index.check(resources)
+            finally:
+                await pages.aclose()
+                self._record_timing(name, started, 0, 0)
+            return name, index.report()
+
+        resource_types = list(dict.fromkeys(resource_types))
+        results = dict(await asyncio.gather(*(check(t) for t in resource_types)))
+        self.metrics.finish()
+        return results
+
+    def emit_wave(self, resource_types: list[str], target_seconds: float | None = None) -> WaveManifest:
+        """Move this run's import blocks into size-bounded waves and write the current one.
+
+        Call after process(). The per-type import files it wrote are folded
+        into the wave manifest and removed, then only the first wave not yet
+        in state is written, as okta-wave-NNN.import.tf, so each PR plans and
+        applies one wave. Types that failed this run keep their files and
+        their manifest entries.
+        """
+        manifest = WaveManifest(self.output_dir, target_seconds)
+        sources = [t for t in dict.fromkeys(resource_types) if t not in self.failed]
+        blocks = {}
+        for name in sources:
+            import_file = self.output_dir / f"{name}.import.tf"
+            if import_file.exists():
+                blocks.update((address, {"id": resource_id, "source": name})
+                              for address, resource_id in read_import_blocks(import_file).items())
+                import_file.unlink()
+
+        root = self.state.get('values', {}).get('root_module', {})
+        managed = {address for address, _, _ in managed_resources(root)}
+        manifest.update(blocks, sources, managed)
+        manifest.emit(managed)
+        manifest.save()
+        return manifest
+
+    def write_report(self, report_file: Path, metrics_file: Path | None = None):
+        """Write the run report as JSON and, optionally, the metrics in OpenMetrics text format."""
+        self.metrics.write_json(Path(report_file))
+        print(f"Run report written to {report_file}")
+        if metrics_file:
+            self.metrics.write_openmetrics(Path(metrics_file))
+            print(f"Metrics written to {metrics_file}")
+
+        totals = self.metrics.report()["totals"]
+        print(f"{totals['requests']} Okta requests ({totals['retries']} retried, {totals['errors']} failed), "
+              f"{totals['request_seconds']}s in requests, {totals['rate_limit_wait_seconds']}s waiting on rate limits")
+
+    async def process_type(self, name: str):
+        self._ensure_client()
+        fetcher = FETCHERS[name]
+        await self._register(name, fetcher["getter"], fetcher["existing"], delta=fetcher["delta"],
+                             probes=fetcher["probes"])
 
     async def process_users(self):
-        await self._register("users", _get_all_users, _existing_users)
+        await self.process_type("users")
     
     async def process_groups(self):
-        await self._register("groups", _get_all_groups, _existing_groups)
+        await self.process_type("groups")
 
     async def process_apps(self):
-        await self._register("apps", _get_all_apps, _existing_apps)
+        await self.process_type("apps")
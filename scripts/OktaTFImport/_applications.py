@@ -1,8 +1,14 @@
 """Application retrieval and processing functions."""
 
-from typing import List
+from typing import List, AsyncIterator
+from functools import partial
 from ._utils import sanitize_resource_name
+from ._paginator import fan_out
 
+# Largest page size the /api/v1/apps endpoint accepts
+PAGE_LIMIT = 200
+# Apps probed for group assignments at the same time
+FANOUT_CONCURRENCY = 16
 
 skip_builtin_apps = [
     "okta_enduser", # Okta Dashboard
@@ -10,6 +16,10 @@ skip_builtin_apps = [
     "saasure" # Okta Admin Console
 ]
 
+# Terraform app resource types (okta_app_<type>) that _map_app_type produces
+APP_TYPES = ('auto_login', 'basic_auth', 'bookmark', 'swa', 'oauth', 'saml', 'secure_password_store',
+             'ws_federation')
+
 def _map_app_type(sign_on_mode: str):
     """Map Okta application sign-on mode to Terraform resource type."""
 
@@ -33,51 +43,88 @@ def _map_app_type(sign_on_mode: str):
         case _:
             return 'unknown'
 
-async def _get_all_apps(client) -> List:
+async def _has_group_assignments(paginator, app, probes=None) -> bool:
+    """Check whether any group is assigned to app, using a one-item page."""
+    if probes is not None:
+        cached = probes.get(app.id, app.last_updated)
+        if cached is not None:
+            return cached
+
+    assignments, _ = await paginator.first_page(
+        partial(paginator.client.list_application_group_assignments, app.id), "app_groups", 1)
+    if probes is not None:
+        probes.put(app.id, app.last_updated, bool(assignments))
+    return bool(assignments)
+
+def _app_records(app_list, has_assignments: dict | None = None) -> List:
+    """Build import records for a page of apps, filtering out unknown types.
+
+    has_assignments maps app id to its group-assignment probe result;
+    okta_app_group_assignments is only emitted for apps that have some.
+    Without probe results every app gets one.
+    """
+    ids = []
+    for app in app_list:
+        app_type = _map_app_type(app.sign_on_mode)
+        if app_type == 'unknown':
+            print(f"Warning: Skipping application '{app.label}' with unknown sign-on mode: {app.sign_on_mode}")
+            continue
+
+        if app.name in skip_builtin_apps:
+            continue
+
+        ids.append({
+            "type": f"okta_app_{app_type}",
+            "id": app.id,
+            "name": sanitize_resource_name(app.label),
+            "last_updated": app.last_updated,
+            "attributes": {"label": app.label, "status": getattr(app.status, "value", app.status)},
+        })
+
+        if has_assignments is not None and not has_assignments.get(app.id):
+            continue
+
+        ids.append({
+            "type": "okta_app_group_assignments",
+            "id": app.id,
+            "name": sanitize_resource_name(app.label),
+            "last_updated": app.last_updated,
+        })
+
+    return ids
+
+async def _get_all_apps(paginator, after: str | None = None, probes=None,
+                        assignments: bool = True) -> AsyncIterator:
+    """Yield (import records, next cursor) for each page of Okta applications.
+
+    The apps endpoint cannot filter on lastUpdated, so apps are always listed in full.
+    Each page of apps is probed concurrently for group assignments; probes, when
+    given, is a ProbeCache whose fresh results are reused instead of re-probing.
+    With assignments=False the probes are skipped and every app gets an
+    okta_app_group_assignments record.
+    """
     print("Fetching all applications from Okta...")
-    apps = []
+    count = 0
+    assigned = 0
     try:
-        app_list, resp, err = await client.list_applications()
-        if err:
-            raise Exception(f"Error fetching applications: {err}")
-        apps.extend(app_list)
-        while resp.has_next():
-            app_list, err = await resp.next()
-            if err:
-                print(f"Warning: Error fetching additional applications: {err}")
-                break
-            apps.extend(app_list)
-        print(f"Successfully retrieved {len(apps)} applications")
-
-        # Build list of app IDs, filtering out unknown types
-        ids = []
-        for app in apps:
-            app_type = _map_app_type(app.sign_on_mode)
-            if app_type == 'unknown':
-                print(f"Warning: Skipping application '{app.label}' with unknown sign-on mode: {app.sign_on_mode}")
-                continue
-
-            if app.name in skip_builtin_apps:
-                continue
-
-            ids.append({
-                "type": f"okta_app_{app_type}",
-                "id": app.id,
-                "name": sanitize_resource_name(app.label)
-            })
-
-            ids.append({
-                "type": "okta_app_group_assignments",
-                "id": app.id,
-                "name": sanitize_resource_name(app.label)
-            })
-
-        return ids
+        async for app_list, cursor in paginator.pages(paginator.client.list_applications, "apps", PAGE_LIMIT, after=after):
+            apps = [app for app in app_list
+                    if _map_app_type(app.sign_on_mode) != 'unknown' and app.name not in skip_builtin_apps]
+            has_assignments = None
+            if assignments:
+                results = await fan_out(
+                    apps, partial(_has_group_assignments, paginator, probes=probes), FANOUT_CONCURRENCY)
+                has_assignments = {app.id: result for app, result in zip(apps, results)}
+                assigned += sum(results)
+            count += len(app_list)
+            yield _app_records(app_list, has_assignments), cursor
+        print(f"Successfully retrieved {count} applications"
+              + (f" ({assigned} with group assignments)" if assignments else ""))
     except Exception as e:  # noqa: BLE001
         raise Exception(f"Failed to retrieve applications: {str(e)}") from e
 
-def _existing_apps(resource) -> bool:
-    if resource.get('type').startswith('okta_app_'):
+def _existing_apps(resource_type: str) -> bool:
+    if resource_type.startswith('okta_app_'):
         return True
 
     return False
@@ -0,0 +1,181 @@
+"""Persistent local cache of fetched Okta entities for incremental imports."""
+
+import time
+import sqlite3
+from pathlib import Path
+
+# Run a full crawl at least this often so deleted objects drop out of the cache
+FULL_RECONCILE_SECONDS = 7 * 24 * 60 * 60
+# Re-check cached probe results (e.g. whether an app has group assignments) this often,
+# since assignment changes do not move the entity's lastUpdated
+PROBE_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+def okta_timestamp(value) -> str | None:
+    """Normalize an Okta lastUpdated value to its ISO 8601 string form."""
+    if value is None:
+        return None
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%dT%H:%M:%S.') + f"{value.microsecond // 1000:03d}Z"
+    return str(value)
+
+
+class EntityCache:
+    """SQLite-backed cache of import records plus a per-type crawl checkpoint.
+
+    Each resource type ("users", "groups", ...) keeps a high-water mark of the
+    newest lastUpdated it has seen, when it was last fully reconciled, and the
+    cursor of an in-progress crawl so an interrupted run can resume.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entities (
+                kind TEXT NOT NULL,
+                type TEXT NOT NULL,
+                id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                last_updated TEXT,
+                run_id TEXT,
+                PRIMARY KEY (kind, type, id)
+            );
+            CREATE TABLE IF NOT EXISTS probes (
+                kind TEXT NOT NULL,
+                id TEXT NOT NULL,
+                last_updated TEXT,
+                result INTEGER NOT NULL,
+                checked REAL NOT NULL,
+                PRIMARY KEY (kind, id)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                kind TEXT PRIMARY KEY,
+                high_water TEXT,
+                last_full REAL,
+                run_id TEXT,
+                run_full INTEGER,
+                since TEXT,
+                cursor TEXT
+            );
+        """)
+
+    def _checkpoint(self, kind: str) -> dict:
+        row = self.db.execute(
+            "SELECT high_water, last_full, run_id, run_full, since, cursor FROM checkpoints WHERE kind = ?",
+            (kind,)).fetchone()
+        if not row:
+            return {}
+        return dict(zip(("high_water", "last_full", "run_id", "run_full", "since", "cursor"), row))
+
+    def begin(self, kind: str, force_full: bool = False, delta: bool = True) -> dict:
+        """Start (or resume) a crawl for kind.
+
+        Returns a dict with `run_id`, `full`, `since` (the lastUpdated filter for
+        a delta crawl, else None) and `cursor` (the page to resume from).
+        """
+        checkpoint = self._checkpoint(kind)
+        if checkpoint.get("cursor"):
+            return {
+                "run_id": checkpoint["run_id"],
+                "full": bool(checkpoint["run_full"]),
+                "since": checkpoint["since"],
+                "cursor": checkpoint["cursor"],
+            }
+
+        stale = time.time() - (checkpoint.get("last_full") or 0) > FULL_RECONCILE_SECONDS
+        full = force_full or not delta or stale or not checkpoint.get("high_water")
+        run = {
+            "run_id": str(time.time_ns()),
+            "full": full,
+            "since": None if full else checkpoint["high_water"],
+            "cursor": None,
+        }
+        self.db.execute("""
+            INSERT INTO checkpoints (kind, run_id, run_full, since) VALUES (?, ?, ?, ?)
+            ON CONFLICT(kind) DO UPDATE SET run_id = excluded.run_id, run_full = excluded.run_full,
+                                            since = excluded.since, cursor = NULL
+        """, (kind, run["run_id"], int(full), run["since"]))
+        self.db.commit()
+        return run
+
+    def add_page(self, kind: str, records: list, run: dict, cursor: str | None):
+        """Upsert one page of records and save the cursor in the same transaction."""
+        with self.db:
+            for r in records:
+                if r.get("deleted"):
+                    self.db.execute("DELETE FROM entities WHERE kind = ? AND type = ? AND id = ?",
+                                    (kind, r["type"], r["id"]))
+                    continue
+                self.db.execute("""
+                    INSERT INTO entities (kind, type, id, name, last_updated, run_id) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(kind, type, id) DO UPDATE SET name = excluded.name,
+                        last_updated = excluded.last_updated, run_id = excluded.run_id
+                """, (kind, r["type"], r["id"], r["name"], okta_timestamp(r.get("last_updated")), run["run_id"]))
+            self.db.execute("UPDATE checkpoints SET cursor = ? WHERE kind = ?", (cursor, kind))
+
+    def finish(self, kind: str, run: dict) -> int:
+        """Close out a completed crawl; returns the number of entities removed.
+
+        A full crawl sees every live object, so anything it did not touch has
+        been deleted in Okta and is dropped from the cache.
+        """
+        with self.db:
+            removed = 0
+            if run["full"]:
+                removed = self.db.execute("DELETE FROM entities WHERE kind = ? AND run_id IS NOT ?",
+                                          (kind, run["run_id"])).rowcount
+                self.db.execute("DELETE FROM probes WHERE kind = ? AND id NOT IN "
+                                "(SELECT id FROM entities WHERE kind = ?)", (kind, kind))
+            (newest,) = self.db.execute("SELECT MAX(last_updated) FROM entities WHERE kind = ?",
+                                        (kind,)).fetchone()
+            previous = self._checkpoint(kind).get("high_water")
+            high_water = max(filter(None, [newest, None if run["full"] else previous]), default=None)
+            self.db.execute("""
+                UPDATE checkpoints SET high_water = ?, cursor = NULL, run_id = NULL,
+                    last_full = CASE WHEN ? THEN ? ELSE last_full END
+                WHERE kind = ?
+            """, (high_water, int(run["full"]), time.time(), kind))
+        return removed
+
+    def probes(self, kind: str, max_age: float) -> "ProbeCache":
+        """Return the cached probe results for kind that are newer than max_age seconds."""
+        return ProbeCache(self, kind, max_age)
+
+    def records(self, kind: str):
+        """Iterate cached import records for kind in stable order."""
+        cursor = self.db.execute(
+            "SELECT type, id, name FROM entities WHERE kind = ? ORDER BY type, id", (kind,))
+        for resource_type, resource_id, name in cursor:
+            yield {"type": resource_type, "id": resource_id, "name": name}
+
+    def close(self):
+        self.db.close()
+
+
+class ProbeCache:
+    """Cached yes/no answers to per-entity probes, such as "does this app have
+    group assignments?", stored next to the entities they describe.
+
+    A result is reused while it is younger than max_age and the entity's
+    lastUpdated has not changed; otherwise the caller probes again and puts
+    the fresh answer back. Writes are committed with the next page or finish().
+    """
+
+    def __init__(self, cache: EntityCache, kind: str, max_age: float):
+        self.cache = cache
+        self.kind = kind
+        self.max_age = max_age
+
+    def get(self, entity_id: str, last_updated) -> bool | None:
+        row = self.cache.db.execute(
+            "SELECT result FROM probes WHERE kind = ? AND id = ? AND last_updated IS ? AND checked > ?",
+            (self.kind, entity_id, okta_timestamp(last_updated), time.time() - self.max_age)).fetchone()
+        return None if row is None else bool(row[0])
+
+    def put(self, entity_id: str, last_updated, result: bool):
+        self.cache.db.execute("""
+            INSERT INTO probes (kind, id, last_updated, result, checked) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(kind, id) DO UPDATE SET last_updated = excluded.last_updated,
+                result = excluded.result, checked = excluded.checked
+        """, (self.kind, entity_id, okta_timestamp(last_updated), int(result), time.time()))
@@ -0,0 +1,50 @@
+"""Resumable checkpoints for streamed import files."""
+
+import json
+from pathlib import Path
+
+
+class ImportCheckpoint:
+    """Records how far an import file has been written.
+
+    The checkpoint stores the cursor of the next page to fetch, the number of
+    blocks written so far and the byte offset of the partial file at that
+    point. Resuming truncates the partial file back to the offset, so a crash
+    between writing a page and saving its checkpoint never duplicates blocks.
+    """
+
+    def __init__(self, output_dir: Path, name: str):
+        self.path = output_dir / f".{name}.import.checkpoint.json"
+        self.cursor = None
+        self.written = 0
+        self.skipped = 0
+        self.offset = 0
+
+    def load(self) -> bool:
+        """Load an existing checkpoint; returns False if there is none."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        self.cursor = data.get('cursor')
+        self.written = data.get('written', 0)
+        self.skipped = data.get('skipped', 0)
+        self.offset = data.get('offset', 0)
+        return self.cursor is not None
+
+    def save(self, cursor: str, written: int, skipped: int, offset: int):
+        self.cursor, self.written, self.skipped, self.offset = cursor, written, skipped, offset
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "cursor": cursor,
+                "written": written,
+                "skipped": skipped,
+                "offset": offset,
+            }, f)
+        tmp_path.replace(self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,95 @@
+"""Live Okta vs terraform state drift detection from bulk list calls."""
+
+from ._state import managed_resources
+from ._applications import APP_TYPES
+
+# Attributes compared between live objects and state, per terraform resource type.
+# The app resource types all share APP_DRIFT_ATTRIBUTES; other okta_app_* types
+# (settings, assignments, policies) are not apps and are not compared.
+DRIFT_ATTRIBUTES = {
+    'okta_user': ('login', 'email', 'first_name', 'last_name', 'status'),
+    'okta_group': ('name', 'description'),
+}
+APP_DRIFT_ATTRIBUTES = ('label', 'status')
+APP_RESOURCE_TYPES = frozenset(f"okta_app_{t}" for t in APP_TYPES)
+
+# Live statuses the okta provider records in state as ACTIVE
+STATUS_ALIASES = {'PASSWORD_EXPIRED': 'ACTIVE', 'RECOVERY': 'ACTIVE'}
+
+
+def drift_attributes(resource_type: str) -> tuple:
+    if resource_type in DRIFT_ATTRIBUTES:
+        return DRIFT_ATTRIBUTES[resource_type]
+    if resource_type in APP_RESOURCE_TYPES:
+        return APP_DRIFT_ATTRIBUTES
+    return ()
+
+
+def _normalize(key: str, value):
+    # The provider stores unset optional strings as "" and live objects return None
+    if value is None:
+        return ""
+    if key == 'status':
+        return STATUS_ALIASES.get(value, value)
+    return value
+
+
+class DriftIndex:
+    """State values of managed resources, hashed by (type, id), for one fetcher's resource types.
+
+    Only resource types with drift attributes that existing_fn accepts are
+    indexed. Live records are checked off one page at a time; whatever is
+    left unseen at the end was deleted in Okta.
+    """
+
+    def __init__(self, state: dict, existing_fn):
+        self.resources = {}  # (resource type, id) -> (address, {attribute: value})
+        root = (state or {}).get('values', {}).get('root_module', {})
+        for address, resource_type, values in managed_resources(root):
+            attributes = drift_attributes(resource_type)
+            if attributes and existing_fn(resource_type) and values.get('id'):
+                self.resources[(resource_type, values['id'])] = (
+                    address, {key: values.get(key) for key in attributes})
+        self._seen = set()
+        self.unmanaged = []
+        self.modified = []
+
+    def check(self, records):
+        """Compare one page of live import records against state."""
+        for r in records:
+            attributes = r.get('attributes')
+            if attributes is None or not drift_attributes(r['type']):
+                continue
+            resource_key = (r['type'], r['id'])
+            managed = self.resources.get(resource_key)
+            if managed is None:
+                if not r.get('deleted'):
+                    self.unmanaged.append({"type": r['type'], "id": r['id'], "name": r['name'], **attributes})
+                continue
+
+            self._seen.add(resource_key)
+            address, state_values = managed
+            changes = {
+                key: {"state": state_values[key], "live": attributes.get(key)}
+                for key in state_values
+                if key in attributes and _normalize(key, state_values[key]) != _normalize(key, attributes.get(key))
+            }
+            if changes:
+                self.modified.append({"address": address, "id": r['id'], "changes": changes})
+
+    def deleted(self) -> list:
+        """Managed resources not seen in the live listing."""
+        return [
+            {"address": address, "type": resource_type, "id": resource_id}
+            for (resource_type, resource_id), (address, values) in sorted(self.resources.items())
+            # Deprovisioned users drop out of the default user listing
+            if (resource_type, resource_id) not in self._seen and values.get('status') != 'DEPROVISIONED'
+        ]
+
+    def report(self) -> dict:
+        return {
+            "managed": len(self.resources),
+            "unmanaged": sorted(self.unmanaged, key=lambda r: (r['type'], r['id'])),
+            "deleted": self.deleted(),
+            "modified": sorted(self.modified, key=lambda r: r['address']),
+        }
@@ -0,0 +1,31 @@
+"""Group rule retrieval and processing functions."""
+
+from typing import AsyncIterator
+from ._utils import sanitize_resource_name
+
+# Largest page size the /api/v1/groups/rules endpoint accepts
+PAGE_LIMIT = 200
+
+async def _get_all_group_rules(paginator, after: str | None = None) -> AsyncIterator:
+    """Yield (import records, next cursor) for each page of Okta group rules."""
+    print("Fetching all group rules from Okta...")
+    count = 0
+    try:
+        async for rule_list, cursor in paginator.pages(paginator.client.list_group_rules, "group_rules", PAGE_LIMIT,
+                                                       after=after):
+            count += len(rule_list)
+            yield [{
+                "type": "okta_group_rule",
+                "id": rule.id,
+                "name": sanitize_resource_name(rule.name)
+            } for rule in rule_list], cursor
+        print(f"Successfully retrieved {count} group rules")
+    except Exception as e:  # noqa: BLE001
+        raise Exception(f"Failed to retrieve group rules: {str(e)}") from e
+
+
+def _existing_group_rules(resource_type: str) -> bool:
+    if resource_type == 'okta_group_rule':
+        return True
+
+    return False
@@ -1,38 +1,40 @@
 """Group retrieval and processing functions."""
 
-from typing import List
+from typing import AsyncIterator
 from ._utils import sanitize_resource_name
 
+# Largest page size the /api/v1/groups endpoint accepts
+PAGE_LIMIT = 10000
 
-async def _get_all_groups(client) -> List:
-    print("Fetching all groups from Okta...")
-    groups = []
+
+async def _get_all_groups(paginator, after: str | None = None, since: str | None = None) -> AsyncIterator:
+    """Yield (import records, next cursor) for each page of Okta groups.
+
+    With since, only groups updated after that lastUpdated timestamp are listed.
+    """
+    print(f"Fetching {'groups updated since ' + since if since else 'all groups'} from Okta...")
+    search = "type eq \"OKTA_GROUP\""
+    if since:
+        search += f" and lastUpdated gt \"{since}\""
+    count = 0
     try:
-        group_list, resp, err = await client.list_groups(query_params={"search": "type eq \"OKTA_GROUP\""})
-        if err:
-            raise Exception(f"Error fetching groups: {err}")
-        groups.extend(group_list)
-        while resp.has_next():
-            group_list, err = await resp.next()
-            if err:
-                print(f"Warning: Error fetching additional groups: {err}")
-                break
-            groups.extend(group_list)
-        print(f"Successfully retrieved {len(groups)} groups")
-
-        ids = list(map(lambda group: {
-                    "type": "okta_group",
-                    "id": group.id,
-                    "name": sanitize_resource_name(group.profile.name)
-                }, groups))
-        
-        return ids
+        async for group_list, cursor in paginator.pages(paginator.client.list_groups, "groups", PAGE_LIMIT,
+                                                        query_params={"search": search}, after=after):
+            count += len(group_list)
+            yield [{
+                "type": "okta_group",
+                "id": group.id,
+                "name": sanitize_resource_name(group.profile.name),
+                "last_updated": group.last_updated,
+                "attributes": {"name": group.profile.name, "description": group.profile.description},
+            } for group in group_list], cursor
+        print(f"Successfully retrieved {count} groups")
     except Exception as e:  # noqa: BLE001
         raise Exception(f"Failed to retrieve groups: {str(e)}") from e
 
 
-def _existing_groups(resource) -> bool:
-    if resource.get('type') == 'okta_group':
+def _existing_groups(resource_type: str) -> bool:
+    if resource_type == 'okta_group':
         return True
 
     return False
@@ -0,0 +1,45 @@
+"""Group membership retrieval and processing functions."""
+
+from typing import AsyncIterator
+from functools import partial
+from ._utils import sanitize_resource_name
+from ._paginator import fan_out
+from ._groups import PAGE_LIMIT as GROUP_PAGE_LIMIT
+
+# Groups probed for members at the same time
+FANOUT_CONCURRENCY = 16
+
+async def _has_members(paginator, group) -> bool:
+    users, _ = await paginator.first_page(
+        partial(paginator.client.list_group_users, group.id), "group_users", 1)
+    return bool(users)
+
+async def _get_all_memberships(paginator, after: str | None = None) -> AsyncIterator:
+    """Yield (import records, next cursor) for each page of groups that have members.
+
+    okta_group_memberships is imported by group id, so each group only needs
+    a one-member probe; the probes for a page of groups run concurrently.
+    """
+    print("Fetching group memberships from Okta...")
+    count = 0
+    try:
+        async for group_list, cursor in paginator.pages(paginator.client.list_groups, "groups", GROUP_PAGE_LIMIT,
+                                                        query_params={"search": "type eq \"OKTA_GROUP\""}, after=after):
+            has_members = await fan_out(group_list, partial(_has_members, paginator), FANOUT_CONCURRENCY)
+            records = [{
+                "type": "okta_group_memberships",
+                "id": group.id,
+                "name": sanitize_resource_name(group.profile.name)
+            } for group, members in zip(group_list, has_members) if members]
+            count += len(records)
+            yield records, cursor
+        print(f"Successfully retrieved memberships for {count} groups")
+    except Exception as e:  # noqa: BLE001
+        raise Exception(f"Failed to retrieve group memberships: {str(e)}") from e
+
+
+def _existing_memberships(resource_type: str) -> bool:
+    if resource_type == 'okta_group_memberships':
+        return True
+
+    return False
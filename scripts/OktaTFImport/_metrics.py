@@ -0,0 +1,185 @@
+"""Request-level metrics and the run report for the Okta importer."""
+
+import json
+import time
+from pathlib import Path
+from collections import defaultdict
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus/OpenMetrics style."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Return (le, cumulative count) pairs, ending with +Inf."""
+        total, result = 0, []
+        for bound, count in zip([*map(str, self.bounds), "+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return float(bound) if bound != "+Inf" else float("inf")
+        return None
+
+    def to_dict(self) -> dict:
+        p99 = self.quantile(0.99)
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 3),
+            "mean_seconds": round(self.sum / self.count, 3) if self.count else None,
+            "p50_le_seconds": self.quantile(0.5),
+            "p99_le_seconds": p99 if p99 != float("inf") else "+Inf",
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class ImportMetrics:
+    """Counters for one importer run.
+
+    The paginator records every Okta request per rate-limit bucket (users,
+    groups, app_users, ...): count, latency, failures, retries and
+    time spent waiting on the rate-limit budget. The importer
+    records per resource type where the time went: waiting for pages from
+    the crawl, waiting for the terraform state, and local processing.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.finished = None
+        self.requests = defaultdict(lambda: {
+            "requests": 0, "errors": 0, "retries": 0,
+            "rate_limit_waits": 0, "rate_limit_wait_seconds": 0.0, "latency": Histogram(),
+        })
+        self.types = defaultdict(lambda: {
+            "pages": 0, "records": 0, "written": 0, "skipped": 0,
+            "fetch_wait_seconds": 0.0, "state_wait_seconds": 0.0, "process_seconds": 0.0, "total_seconds": 0.0,
+        })
+
+    # Request-level metrics, recorded by OktaPaginator
+
+    def request(self, bucket: str, seconds: float, error: bool):
+        stats = self.requests[bucket]
+        stats["requests"] += 1
+        stats["latency"].observe(seconds)
+        if error:
+            stats["errors"] += 1
+
+    def retry(self, bucket: str):
+        self.requests[bucket]["retries"] += 1
+
+    def rate_limit_wait(self, bucket: str, seconds: float):
+        stats = self.requests[bucket]
+        stats["rate_limit_waits"] += 1
+        stats["rate_limit_wait_seconds"] += seconds
+
+    # Per resource type metrics, recorded by OktaTFImport
+
+    def add(self, name: str, key: str, value):
+        self.types[name][key] += value
+
+    def finish(self):
+        self.finished = time.time()
+
+    def report(self) -> dict:
+        elapsed = (self.finished or time.time()) - self.started
+        requests = {}
+        for bucket, stats in sorted(self.requests.items()):
+            requests[bucket] = {k: v for k, v in stats.items() if k != "latency"}
+            requests[bucket]["rate_limit_wait_seconds"] = round(stats["rate_limit_wait_seconds"], 3)
+            requests[bucket]["latency"] = stats["latency"].to_dict()
+
+        types = {}
+        for name, stats in sorted(self.types.items()):
+            types[name] = {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+
+        return {
+            "started": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started)),
+            "elapsed_seconds": round(elapsed, 3),
+            "totals": {
+                "requests": sum(s["requests"] for s in self.requests.values()),
+                "errors": sum(s["errors"] for s in self.requests.values()),
+                "retries": sum(s["retries"] for s in self.requests.values()),
+                "request_seconds": round(sum(s["latency"].sum for s in self.requests.values()), 3),
+                "rate_limit_wait_seconds": round(
+                    sum(s["rate_limit_wait_seconds"] for s in self.requests.values()), 3),
+            },
+            "requests": requests,
+            "types": types,
+        }
+
+    def write_json(self, path: Path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
+
+    def write_openmetrics(self, path: Path):
+        """Write the metrics in OpenMetrics text exposition format."""
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.extend(samples)
+
+        def counter(name, help_text, stats, key, label):
+            family(name, "counter", help_text, [
+                f'{name}_total{{{label}="{k}"}} {v[key]}' for k, v in sorted(stats.items())])
+
+        counter("okta_import_requests", "Okta API requests issued.", self.requests, "requests", "bucket")
+        counter("okta_import_request_errors", "Okta API requests that failed.", self.requests, "errors", "bucket")
+        counter("okta_import_request_retries", "Okta API requests retried.", self.requests, "retries", "bucket")
+        counter("okta_import_rate_limit_waits", "Waits for the rate-limit budget to reset.",
+                self.requests, "rate_limit_waits", "bucket")
+        counter("okta_import_rate_limit_wait_seconds", "Seconds spent waiting on the rate-limit budget.",
+                self.requests, "rate_limit_wait_seconds", "bucket")
+
+        samples = []
+        for bucket, stats in sorted(self.requests.items()):
+            histogram = stats["latency"]
+            for le, count in histogram.cumulative():
+                samples.append(f'okta_import_request_duration_seconds_bucket{{bucket="{bucket}",le="{le}"}} {count}')
+            samples.append(f'okta_import_request_duration_seconds_count{{bucket="{bucket}"}} {histogram.count}')
+            samples.append(f'okta_import_request_duration_seconds_sum{{bucket="{bucket}"}} {histogram.sum}')
+        family("okta_import_request_duration_seconds", "histogram", "Okta API request latency.", samples)
+
+        counter("okta_import_pages", "Pages fetched per resource type.", self.types, "pages", "type")
+        counter("okta_import_records", "Records fetched per resource type.", self.types, "records", "type")
+        for key, help_text in (
+            ("fetch_wait_seconds", "Seconds spent waiting for pages from the Okta crawl."),
+            ("state_wait_seconds", "Seconds spent waiting for the terraform state."),
+            ("process_seconds", "Seconds spent on local processing and writing import files."),
+        ):
+            name = f"okta_import_{key}"
+            family(name, "gauge", help_text, [
+                f'{name}{{type="{k}"}} {v[key]}' for k, v in sorted(self.types.items())])
+
+        family("okta_import_run_seconds", "gauge", "Wall-clock duration of the import run.",
+               [f"okta_import_run_seconds {(self.finished or time.time()) - self.started}"])
+        lines.append("# EOF")
+
+        with open(path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
@@ -0,0 +1,241 @@
+"""Rate-limit-aware pagination over Okta list endpoints."""
+
+import re
+import time
+import random
+import asyncio
+from urllib.parse import urlparse, parse_qs
+from ._metrics import ImportMetrics
+
+
+# 429 and transient server errors are retried; None covers transport failures
+RETRY_STATUSES = {None, 429, 500, 502, 503, 504}
+LINK_NEXT_PATTERN = re.compile(r'<([^>]+)>\s*;\s*rel="next"')
+# Pages a Prefetcher fetches ahead of its consumer before the crawl waits
+PREFETCH_PAGES = 4
+
+
+def _header(headers, name: str):
+    """Case-insensitive header lookup that works for dicts and multidicts."""
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def _next_cursor(headers) -> str | None:
+    """Extract the `after` cursor from the rel="next" Link header, if any."""
+    if not headers:
+        return None
+    if hasattr(headers, 'getall'):
+        links = headers.getall('Link', [])
+    else:
+        links = [v for k, v in headers.items() if k.lower() == 'link']
+
+    for link in links:
+        match = LINK_NEXT_PATTERN.search(link)
+        if match:
+            after = parse_qs(urlparse(match.group(1)).query).get('after')
+            return after[0] if after else None
+    return None
+
+
+class RateLimitBudget:
+    """Tracks Okta X-Rate-Limit-* headers per endpoint bucket.
+
+    Okta rate limits each endpoint family separately, so users, groups and apps
+    each get their own bucket. Requests go out freely while the bucket has
+    headroom and wait for the reset once only `reserve` calls remain.
+    """
+
+    def __init__(self, reserve: int = 2):
+        self.reserve = reserve
+        self._buckets = {}  # bucket -> {"remaining": int, "reset": epoch seconds}
+
+    def update(self, bucket: str, headers):
+        remaining = _header(headers, 'X-Rate-Limit-Remaining')
+        reset = _header(headers, 'X-Rate-Limit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            self._buckets[bucket] = {"remaining": int(remaining), "reset": float(reset)}
+        except ValueError:
+            pass
+
+    def reset_in(self, bucket: str) -> float:
+        """Seconds until the bucket's window resets (0 if unknown or passed)."""
+        state = self._buckets.get(bucket)
+        if not state:
+            return 0.0
+        return max(state["reset"] - time.time(), 0.0)
+
+    async def acquire(self, bucket: str) -> float:
+        """Wait, if needed, so the next request stays under the bucket's budget.
+
+        Returns the number of seconds spent waiting.
+        """
+        state = self._buckets.get(bucket)
+        if not state:
+            return 0.0
+
+        if time.time() >= state["reset"]:
+            # Window rolled over; the next response will report the new budget
+            del self._buckets[bucket]
+            return 0.0
+
+        if state["remaining"] <= self.reserve:
+            delay = self.reset_in(bucket) + random.uniform(0, 0.5)
+            await asyncio.sleep(delay)
+            self._buckets.pop(bucket, None)
+            return delay
+
+        # Reserve a slot so concurrent requests don't all read the same budget
+        state["remaining"] -= 1
+        return 0.0
+
+
+class OktaPaginator:
+    """Issues paged Okta list requests with bounded concurrency and retries.
+
+    All fetchers share one paginator, so the semaphore bounds the number of
+    in-flight requests across every resource type and the rate-limit budget
+    reflects every response seen so far. Every request is recorded in
+    `metrics`.
+    """
+
+    def __init__(self, client, max_concurrency: int = 4, max_retries: int = 5,
+                 metrics: ImportMetrics | None = None):
+        self.client = client
+        self.max_retries = max_retries
+        self.limiter = asyncio.Semaphore(max_concurrency)
+        self.budget = RateLimitBudget()
+        self.metrics = metrics or ImportMetrics()
+
+    async def _request(self, list_fn, bucket: str, query_params: dict):
+        """Fetch a single page, retrying 429/5xx with backoff."""
+        for attempt in range(self.max_retries + 1):
+            waited = await self.budget.acquire(bucket)
+            if waited:
+                self.metrics.rate_limit_wait(bucket, waited)
+            async with self.limiter:
+                started = time.perf_counter()
+                items, resp, err = await list_fn(query_params=dict(query_params))
+                elapsed = time.perf_counter() - started
+
+            headers = resp.get_headers() if resp is not None and hasattr(resp, 'get_headers') else None
+            if headers is None:
+                # OktaAPIError exposes `headers`, HTTPError `response_headers`
+                headers = getattr(err, 'headers', None) or getattr(err, 'response_headers', None)
+            self.budget.update(bucket, headers)
+
+            self.metrics.request(bucket, elapsed, bool(err))
+
+            if not err:
+                return items, _next_cursor(headers)
+
+            status = getattr(err, 'status', None)
+            if status is None and resp is not None and hasattr(resp, 'get_status'):
+                status = resp.get_status()
+            if status not in RETRY_STATUSES or attempt == self.max_retries:
+                raise Exception(f"{err} (after {attempt + 1} attempt(s))")
+
+            if status == 429 and self.budget.reset_in(bucket) > 0:
+                delay = self.budget.reset_in(bucket)
+            else:
+                delay = min(2 ** attempt, 60)
+            delay += random.uniform(0, 0.5)
+            self.metrics.retry(bucket)
+            if status == 429:
+                self.metrics.rate_limit_wait(bucket, delay)
+            print(f"Retrying {bucket} page (status {status}) in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def first_page(self, list_fn, bucket: str, limit: int, query_params: dict | None = None):
+        """Fetch only the first page of a list endpoint; returns (items, next_cursor)."""
+        params = dict(query_params or {})
+        params["limit"] = limit
+        return await self._request(list_fn, bucket, params)
+
+    async def pages(self, list_fn, bucket: str, limit: int, query_params: dict | None = None,
+                    after: str | None = None):
+        """Yield (items, next_cursor) for every page of a list endpoint.
+
+        Requests the maximum page size and follows the `after` cursor from the
+        Link header. A failing page is retried from its own cursor, so a
+        transient error never truncates the result; once retries are exhausted
+        the error is raised instead.
+        """
+        params = dict(query_params or {})
+        params["limit"] = limit
+
+        cursor = after
+        while True:
+            if cursor:
+                params["after"] = cursor
+            items, cursor = await self._request(list_fn, bucket, params)
+            yield items, cursor
+            if not cursor:
+                break
+
+
+class Prefetcher:
+    """Pulls pages from an async iterator in a background task.
+
+    Iterating yields the same pages in order. The crawl keeps going while the
+    consumer is busy or waiting on something else (such as the terraform
+    state export), but stops once `ahead` pages are buffered, so a slow
+    consumer never holds more than a few pages in memory.
+    """
+
+    def __init__(self, pages, ahead: int = PREFETCH_PAGES):
+        self._queue = asyncio.Queue(maxsize=ahead)
+        self._task = asyncio.create_task(self._drain(pages))
+
+    async def _drain(self, pages):
+        try:
+            async for page in pages:
+                await self._queue.put(("page", page))
+            await self._queue.put(("done", None))
+        except Exception as e:  # noqa: BLE001
+            await self._queue.put(("error", e))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        kind, value = await self._queue.get()
+        if kind == "done":
+            raise StopAsyncIteration
+        if kind == "error":
+            raise value
+        return value
+
+    async def aclose(self):
+        """Stop the background crawl."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def prefetch(pages) -> Prefetcher:
+    """Start pulling pages from an async iterator in the background right away."""
+    return Prefetcher(pages)
+
+
+async def fan_out(items, fn, concurrency: int) -> list:
+    """Run fn over items with at most `concurrency` calls in flight.
+
+    Results are returned in the order of items, so output built from them
+    stays deterministic regardless of completion order.
+    """
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def bounded(item):
+        async with limiter:
+            return await fn(item)
+
+    return await asyncio.gather(*(bounded(item) for item in items))
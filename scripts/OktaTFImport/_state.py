@@ -0,0 +1,96 @@
+"""Index of resource ids already managed by terraform or pending import."""
+
+import re
+import sys
+from pathlib import Path
+from collections import defaultdict
+
+IMPORT_BLOCK_PATTERN = re.compile(r'import\s*\{(.*?)\}', re.DOTALL)
+IMPORT_TO_PATTERN = re.compile(r'\bto\s*=\s*([A-Za-z0-9_-]+)\.([A-Za-z0-9_-]+)')
+IMPORT_ID_PATTERN = re.compile(r'\bid\s*=\s*"([^"]*)"')
+
+# Resource types whose import id is built from attributes other than `id`
+COMPOSITE_IMPORT_IDS = {
+    'okta_app_user': ('app_id', 'user_id'),
+}
+
+
+def managed_resources(module: dict, prefix: str = ""):
+    """Yield (address, resource type, values) for every managed resource in a
+    `terraform show -json` module, recursing into child modules."""
+    for r in module.get('resources', []):
+        if r.get('mode', 'managed') == 'managed':
+            yield r.get('address') or f"{prefix}{r.get('type')}.{r.get('name')}", r.get('type'), r.get('values') or {}
+    for child in module.get('child_modules', []):
+        yield from managed_resources(child, f"{child.get('address', '')}.")
+
+
+class StateIndex:
+    """Resource ids bucketed by terraform resource type.
+
+    Built once per run from the `terraform show -json` state (including nested
+    child modules) plus any import blocks already sitting in `*.import.tf`
+    files, so every "is this already managed?" check is a set lookup.
+    """
+
+    def __init__(self, state: dict | None = None):
+        self._ids = defaultdict(set)
+        self._names = defaultdict(dict)  # resource type -> {resource name: id}
+        if state:
+            self._add_module(state.get('values', {}).get('root_module', {}), root=True)
+
+    def _add_module(self, module: dict, root: bool = False):
+        for r in module.get('resources', []):
+            # Data sources share resource types but are not managed objects
+            if r.get('mode', 'managed') != 'managed':
+                continue
+            values = r.get('values') or {}
+            if r.get('type') in COMPOSITE_IMPORT_IDS:
+                parts = [values.get(key) for key in COMPOSITE_IMPORT_IDS[r.get('type')]]
+                resource_id = "/".join(parts) if all(parts) else None
+            else:
+                resource_id = values.get('id')
+            if resource_id:
+                self._ids[r.get('type')].add(resource_id)
+                if root:
+                    # Only root-module names share an address space with import blocks
+                    self._names[r.get('type')][r.get('name')] = resource_id
+        for child in module.get('child_modules', []):
+            self._add_module(child)
+
+    def add_import_files(self, directory: Path, exclude: set[Path] = frozenset()) -> int:
+        """Index import blocks from `*.import.tf` files under directory.
+
+        Files named in exclude (the ones this run regenerates) are skipped.
+        Returns the number of import blocks indexed.
+        """
+        count = 0
+        for import_file in sorted(directory.rglob("*.import.tf")):
+            if import_file in exclude or ".terraform" in import_file.parts:
+                continue
+            try:
+                content = import_file.read_text(encoding="utf-8")
+            except OSError as e:
+                print(f"Warning: could not read {import_file}: {e}", file=sys.stderr)
+                continue
+
+            for block in IMPORT_BLOCK_PATTERN.findall(content):
+                to_match = IMPORT_TO_PATTERN.search(block)
+                id_match = IMPORT_ID_PATTERN.search(block)
+                if to_match and id_match:
+                    self._ids[to_match.group(1)].add(id_match.group(1))
+                    self._names[to_match.group(1)][to_match.group(2)] = id_match.group(1)
+                    count += 1
+        return count
+
+    def ids(self, type_filter) -> dict[str, set]:
+        """The id sets of every resource type accepted by type_filter, by type.
+
+        Ids are only unique within a resource type: an app's group assignments
+        are imported under the app's own id.
+        """
+        return {resource_type: ids for resource_type, ids in self._ids.items() if type_filter(resource_type)}
+
+    def names(self) -> dict[str, dict[str, str]]:
+        """Resource names already taken, per resource type, mapped to their ids."""
+        return {resource_type: dict(names) for resource_type, names in self._names.items()}
@@ -1,36 +1,44 @@
 """User retrieval and processing functions."""
 
-from typing import List
+from typing import AsyncIterator
 from ._utils import sanitize_resource_name
 
-async def _get_all_users(client) -> List:
-    print("Fetching all users from Okta...")
-    users = []
-    try:
-        user_list, resp, err = await client.list_users()
-        if err:
-            raise Exception(f"Error fetching users: {err}")
-        users.extend(user_list)
-        while resp.has_next():
-            user_list, err = await resp.next()
-            if err:
-                print(f"Warning: Error fetching additional users: {err}")
-                break
-            users.extend(user_list)
-        print(f"Successfully retrieved {len(users)} users")
+# Largest page size the /api/v1/users endpoint accepts
+PAGE_LIMIT = 200
+
+async def _get_all_users(paginator, after: str | None = None, since: str | None = None) -> AsyncIterator:
+    """Yield (import records, next cursor) for each page of Okta users.
 
-        ids = list(map(lambda user: {
-                    "type": "okta_user",
-                    "id": user.id,
-                    "name": sanitize_resource_name(user.profile.login)
-                }, users))
-        
-        return ids
+    With since, only users updated after that lastUpdated timestamp are listed.
+    A search also returns deprovisioned users, which are flagged as deleted.
+    """
+    print(f"Fetching {'users updated since ' + since if since else 'all users'} from Okta...")
+    query_params = {"search": f"lastUpdated gt \"{since}\""} if since else None
+    count = 0
+    try:
+        async for user_list, cursor in paginator.pages(paginator.client.list_users, "users", PAGE_LIMIT,
+                                                       query_params=query_params, after=after):
+            count += len(user_list)
+            yield [{
+                "type": "okta_user",
+                "id": user.id,
+                "name": sanitize_resource_name(user.profile.login),
+                "last_updated": user.last_updated,
+                "deleted": getattr(user.status, "value", user.status) == "DEPROVISIONED",
+                "attributes": {
+                    "login": user.profile.login,
+                    "email": user.profile.email,
+                    "first_name": user.profile.first_name,
+                    "last_name": user.profile.last_name,
+                    "status": getattr(user.status, "value", user.status),
+                },
+            } for user in user_list], cursor
+        print(f"Successfully retrieved {count} users")
     except Exception as e:
         raise Exception(f"Failed to retrieve users: {str(e)}") from e
     
-def _existing_users(resource) -> bool:
-    if resource.get('type') == 'okta_user':
+def _existing_users(resource_type: str) -> bool:
+    if resource_type == 'okta_user':
         return True
 
     return False
@@ -1,8 +1,11 @@
 """Utility helpers for Okta terraform import generation."""
 
 import re
+import hashlib
+import filecmp
+from pathlib import Path
+from collections import defaultdict
 from typing import Iterable, Any
-import random
 
 
 def sanitize_resource_name(name: str) -> str:
@@ -35,12 +38,54 @@ def sort_entities(items: Iterable[Any], key_attr: str):
     return sorted(items, key=lambda o: resolve(o, key_attr))
 
 
+def stable_suffix(resource_id: str, length: int = 6) -> str:
+    """Short hash of an Okta id; identical across runs and machines."""
+    return hashlib.sha256(resource_id.encode("utf-8")).hexdigest()[:length]
+
+
+class ImportNamer:
+    """Assigns deterministic, collision-free resource names per resource type.
+
+    Names are the sanitized display name plus a short hash of the Okta id, so
+    the same object always gets the same address. If two ids still map to the
+    same address, the later one falls back to its full sanitized id.
+    """
+
+    def __init__(self, taken: dict[str, dict[str, str]] | None = None):
+        # resource type -> {resource name: okta id}
+        self._names = defaultdict(dict)
+        for resource_type, names in (taken or {}).items():
+            self._names[resource_type].update(names)
+
+    def name(self, resource_type: str, resource_name: str, resource_id: str) -> str:
+        names = self._names[resource_type]
+        candidate = f"{resource_name}_{stable_suffix(resource_id)}"
+        owner = names.setdefault(candidate, resource_id)
+        if owner != resource_id:
+            candidate = f"{resource_name}_{sanitize_resource_name(resource_id)}"
+            names[candidate] = resource_id
+        return candidate
+
+
 def terraform_import_block(resource_type: str, resource_name: str, resource_id: str) -> str:
     """Generate a terraform import block string."""
     
     string = (f"import {{\n"
-              f"  to = {resource_type}.{resource_name}_{random.randint(1000, 9999)}\n"
+              f"  to = {resource_type}.{resource_name}\n"
               f"  id = \"{resource_id}\"\n"
               f"}}\n\n")
 
     return string
+
+
+def replace_if_changed(new_file: Path, output_file: Path) -> bool:
+    """Move new_file over output_file unless their contents are identical.
+
+    Leaving an unchanged file alone keeps it byte-identical (and its mtime
+    untouched), so repeat imports produce no diff. Returns True if replaced.
+    """
+    if output_file.exists() and filecmp.cmp(new_file, output_file, shallow=False):
+        new_file.unlink()
+        return False
+    new_file.replace(output_file)
+    return True
@@ -0,0 +1,188 @@
+"""Size-bounded import waves, each planned and applied in its own PR."""
+
+import re
+import json
+from pathlib import Path
+from collections import Counter
+
+from ._state import IMPORT_BLOCK_PATTERN, IMPORT_TO_PATTERN, IMPORT_ID_PATTERN
+from ._utils import terraform_import_block, replace_if_changed
+
+WAVE_MANIFEST = ".okta-import-waves.json"
+WAVE_FILE_GLOB = "okta-wave-*.import.tf"
+WAVE_FILE_PATTERN = re.compile(r'^okta-wave-\d+\.import\.tf$')
+# Target plan duration of one wave, in seconds
+DEFAULT_WAVE_SECONDS = 600
+# Plan cost assumed for resource types without a measurement yet
+DEFAULT_SECONDS_PER_IMPORT = 0.5
+# Weight of the newest measurement in the running per-type cost
+COST_SMOOTHING = 0.5
+
+
+def wave_file_name(number: int) -> str:
+    return f"okta-wave-{number:03d}.import.tf"
+
+
+def generated_file_name(number: int) -> str:
+    """Where config for a wave's imports is generated; one file per wave, so
+    generated config committed with earlier waves never blocks the next one."""
+    return f"generated-wave-{number:03d}.tf"
+
+
+def read_import_blocks(import_file: Path) -> dict[str, str]:
+    """Return {address: id} for the import blocks in an import file."""
+    blocks = {}
+    for block in IMPORT_BLOCK_PATTERN.findall(import_file.read_text(encoding="utf-8")):
+        to_match = IMPORT_TO_PATTERN.search(block)
+        id_match = IMPORT_ID_PATTERN.search(block)
+        if to_match and id_match:
+            blocks[f"{to_match.group(1)}.{to_match.group(2)}"] = id_match.group(1)
+    return blocks
+
+
+def _resource_type(address: str) -> str:
+    return address.split(".", 1)[0]
+
+
+class WaveManifest:
+    """Assigns pending import blocks to waves sized to a target plan duration.
+
+    The manifest (.okta-import-waves.json in the environment directory)
+    records each wave's addresses, their Okta ids and the fetcher that
+    produced them, whether the wave has been emitted as an import file and
+    whether it has been applied. A wave is applied once every one of its
+    addresses is in state (or is gone from Okta); applied waves are never
+    planned again.
+
+    Only one wave is emitted at a time. Once its file has been written its
+    membership is fixed, so re-running the importer while its PR is open
+    rewrites the same file. Waves not yet emitted are repacked on every run
+    from the blocks still pending, with the latest per-resource plan cost.
+    """
+
+    def __init__(self, directory: Path, target_seconds: float | None = None):
+        self.directory = Path(directory)
+        self.path = self.directory / WAVE_MANIFEST
+        data = json.loads(self.path.read_text()) if self.path.exists() else {}
+        # The target of earlier runs applies unless a new one is given
+        self.target_seconds = target_seconds or data.get("target_seconds", DEFAULT_WAVE_SECONDS)
+        self.costs = data.get("seconds_per_import", {})
+        self.waves = data.get("waves", [])
+
+    def save(self):
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "target_seconds": self.target_seconds,
+                "seconds_per_import": self.costs,
+                "waves": self.waves,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        tmp_path.replace(self.path)
+
+    def cost(self, resource_type: str) -> float:
+        """Measured plan seconds per import of resource_type (or the default)."""
+        return self.costs.get(resource_type, DEFAULT_SECONDS_PER_IMPORT)
+
+    def estimate(self, addresses) -> float:
+        return sum(self.cost(_resource_type(a)) for a in addresses)
+
+    def record_plan(self, seconds: float, counts: Counter):
+        """Fold the duration of a plan covering counts[type] imports into the per-type costs.
+
+        A plan of several resource types is split between them in proportion
+        to their current estimates; for a single-type plan that is exact.
+        """
+        estimated = sum(self.cost(t) * n for t, n in counts.items())
+        if not estimated:
+            return
+        for resource_type, n in counts.items():
+            if not n:
+                continue
+            sample = seconds * self.cost(resource_type) / estimated
+            previous = self.costs.get(resource_type)
+            self.costs[resource_type] = round(
+                sample if previous is None else COST_SMOOTHING * sample + (1 - COST_SMOOTHING) * previous, 4)
+
+    def current(self) -> dict | None:
+        """The first wave not yet applied."""
+        return next((w for w in self.waves if w["status"] != "applied"), None)
+
+    def update(self, blocks: dict[str, dict], sources: list[str], managed: set[str]):
+        """Reconcile the manifest with this run's pending import blocks.
+
+        blocks maps each pending address to {"id", "source"} for every fetcher
+        in sources (the ones that completed this run); managed holds the
+        addresses in state. Addresses from other fetchers cannot be checked
+        and are left pending as they are.
+        """
+        def outstanding(address, entry):
+            if address in managed:
+                return False
+            return entry["source"] not in sources or address in blocks
+
+        fixed = set()
+        for wave in self.waves:
+            if wave["status"] != "pending" or not wave["emitted"]:
+                continue
+            if not any(outstanding(a, e) for a, e in wave["imports"].items()):
+                wave["status"] = "applied"
+            else:
+                # Objects deleted in Okta since the wave was emitted drop out of it
+                wave["imports"] = {a: e for a, e in wave["imports"].items() if a in managed or outstanding(a, e)}
+                fixed.update(wave["imports"])
+
+        pool = {a: e for a, e in blocks.items() if a not in fixed}
+        for wave in self.waves:
+            if wave["status"] == "pending" and not wave["emitted"]:
+                pool.update((a, e) for a, e in wave["imports"].items()
+                            if a not in fixed and outstanding(a, e))
+        self.waves = [w for w in self.waves if w["status"] == "applied" or w["emitted"]]
+        self._pack(pool, sources)
+
+    def _pack(self, pool: dict[str, dict], sources: list[str]):
+        """Append waves for pool, filling each up to the target plan duration."""
+        order = {source: i for i, source in enumerate(sources)}
+        addresses = sorted(pool, key=lambda a: (order.get(pool[a]["source"], len(order)), a))
+        number = max((w["wave"] for w in self.waves), default=0)
+
+        wave = None
+        for address in addresses:
+            cost = self.cost(_resource_type(address))
+            if wave is None or (wave["imports"] and wave["estimated_seconds"] + cost > self.target_seconds):
+                number += 1
+                wave = {"wave": number, "file": wave_file_name(number), "generated": generated_file_name(number),
+                        "status": "pending", "emitted": False, "estimated_seconds": 0.0, "imports": {}}
+                self.waves.append(wave)
+            wave["imports"][address] = pool[address]
+            wave["estimated_seconds"] += cost
+        for w in self.waves:
+            w["estimated_seconds"] = round(w["estimated_seconds"], 1)
+
+    def emit(self, managed: set[str]) -> dict | None:
+        """Write the import file of the current wave and remove every other wave file.
+
+        Addresses of the wave already in state are left out of the file.
+        Returns the current wave (None if every wave is applied).
+        """
+        wave = self.current()
+        keep = None
+        if wave:
+            wave["emitted"] = True
+            wave.setdefault("generated", generated_file_name(wave["wave"]))
+            keep = self.directory / wave["file"]
+            tmp_file = keep.with_suffix(".tf.tmp")
+            with open(tmp_file, 'w') as f:
+                f.write(f"# Terraform import blocks for Okta, wave {wave['wave']}\n")
+                f.write(f"# Generated by import.py; see {WAVE_MANIFEST}\n\n")
+                for address, entry in sorted(wave["imports"].items()):
+                    if address not in managed:
+                        resource_type, resource_name = address.split(".", 1)
+                        f.write(terraform_import_block(resource_type, resource_name, entry["id"]))
+            if not replace_if_changed(tmp_file, keep):
+                print(f"{keep} is unchanged")
+
+        for wave_file in self.directory.glob(WAVE_FILE_GLOB):
+            if wave_file != keep and WAVE_FILE_PATTERN.match(wave_file.name):
+                wave_file.unlink()
+        return wave
@@ -0,0 +1,160 @@
+"""Sharded `terraform plan -generate-config-out` for bulk imports."""
+
+import re
+import sys
+import shutil
+import asyncio
+from pathlib import Path
+from collections import defaultdict
+
+from ._terraform import TerraformRunner
+from .OktaTFImport._utils import terraform_import_block
+from .OktaTFImport._waves import read_import_blocks
+
+# Shard working copies live inside the environment directory so the docker
+# runner can reach them through the existing /terraform mount
+SHARD_DIR = ".import-shards"
+SHARD_IMPORT_FILE = "shard.import.tf"
+GENERATED_FILE = "generated.tf"
+
+GENERATED_HEADER_PATTERN = re.compile(r'^# __generated__ by Terraform from ', re.MULTILINE)
+RESOURCE_PATTERN = re.compile(r'^resource\s+"([^"]+)"\s+"([^"]+)"', re.MULTILINE)
+
+# Files that must not be copied into a shard: other shards, import blocks
+# (each shard gets only its own), wrapper output and earlier generated config
+SHARD_IGNORE = shutil.ignore_patterns(
+    ".terraform", SHARD_DIR, ".git", "*.import.tf", "*.import.tf.partial",
+    "generated*.tf", "_consolidated.tf", "_consolidated_source_map.json",
+    ".okta-import-cache.sqlite", ".okta-import-waves.json", ".terraform-snapshots",
+)
+
+
+def collect_import_blocks(directory: Path) -> list[tuple[str, str, str]]:
+    """Return (resource type, resource name, id) for every import block, sorted by address."""
+    blocks = []
+    for import_file in sorted(directory.rglob("*.import.tf")):
+        if ".terraform" in import_file.parts or SHARD_DIR in import_file.parts:
+            continue
+        for address, resource_id in read_import_blocks(import_file).items():
+            resource_type, resource_name = address.split(".", 1)
+            blocks.append((resource_type, resource_name, resource_id))
+    return sorted(set(blocks))
+
+
+def partition(blocks: list, shards: int) -> list[list]:
+    """Split blocks into at most `shards` contiguous, evenly sized groups."""
+    shards = max(1, min(shards, len(blocks)))
+    size, extra = divmod(len(blocks), shards)
+    groups, start = [], 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(blocks[start:end])
+        start = end
+    return groups
+
+
+def _prepare_shard(directory: Path, shard_dir: Path, blocks: list):
+    """Create an isolated working copy holding only this shard's import blocks."""
+    shutil.copytree(directory, shard_dir, ignore=SHARD_IGNORE, symlinks=True)
+
+    # Reuse the initialized providers and backend config rather than re-running init
+    terraform_dir = directory / ".terraform"
+    if terraform_dir.exists():
+        (shard_dir / ".terraform").symlink_to(Path("..", "..", ".terraform"), target_is_directory=True)
+
+    with open(shard_dir / SHARD_IMPORT_FILE, 'w') as f:
+        for resource_type, resource_name, resource_id in blocks:
+            f.write(terraform_import_block(resource_type, resource_name, resource_id))
+
+
+def _split_generated(content: str) -> list[tuple[str, str, str]]:
+    """Split generated HCL into (resource type, resource name, block text) entries."""
+    starts = [m.start() for m in GENERATED_HEADER_PATTERN.finditer(content)]
+    resources = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(content)
+        block = content[start:end].strip() + "\n"
+        match = RESOURCE_PATTERN.search(block)
+        if match:
+            resources.append((match.group(1), match.group(2), block))
+    return resources
+
+
+async def _run_shard(runner: TerraformRunner, index: int, shard_dir: Path, blocks: list,
+                     limiter: asyncio.Semaphore) -> dict:
+    async with limiter:
+        print(f"Shard {index + 1}: planning {len(blocks)} imports")
+        returncode, _, stderr = await runner.run(
+            "plan", "-lock=false", "-input=false", f"-generate-config-out={GENERATED_FILE}",
+            workdir=str(shard_dir),
+        )
+
+    generated = shard_dir / GENERATED_FILE
+    resources = _split_generated(generated.read_text(encoding="utf-8")) if generated.exists() else []
+    return {"index": index, "blocks": blocks, "returncode": returncode, "stderr": stderr, "resources": resources}
+
+
+async def generate_config_sharded(runner: TerraformRunner, directory: str, shards: int,
+                                  parallelism: int | None = None) -> bool:
+    """Run generate-config-out over the import blocks in parallel shards.
+
+    Each shard plans a subset of the import blocks in its own working copy
+    with `-lock=false`. Generated resources are merged into one
+    `generated_<type>.tf` file per resource type, sorted by name. Returns
+    True if every shard succeeded.
+    """
+    directory = Path(directory)
+    existing = sorted(directory.glob("generated_*.tf"))
+    if existing:
+        print(f"Error generating terraform config: {', '.join(p.name for p in existing)} already exist; "
+              "move or remove them first", file=sys.stderr)
+        return False
+
+    blocks = collect_import_blocks(directory)
+    if not blocks:
+        print("No import blocks found; skipping config generation")
+        return True
+
+    groups = partition(blocks, shards)
+    work_dir = directory / SHARD_DIR
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir()
+
+    try:
+        shard_dirs = []
+        for i, group in enumerate(groups):
+            shard_dir = work_dir / f"shard-{i}"
+            _prepare_shard(directory, shard_dir, group)
+            shard_dirs.append(shard_dir)
+
+        limiter = asyncio.Semaphore(parallelism or len(groups))
+        results = await asyncio.gather(*(
+            _run_shard(runner, i, shard_dir, group, limiter)
+            for i, (shard_dir, group) in enumerate(zip(shard_dirs, groups))
+        ))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    by_type = defaultdict(list)
+    for result in results:
+        for resource_type, resource_name, block in result["resources"]:
+            by_type[resource_type].append((resource_name, block))
+
+    for resource_type, resources in sorted(by_type.items()):
+        output_file = directory / f"generated_{resource_type}.tf"
+        with open(output_file, 'w') as f:
+            f.write("# __generated__ by Terraform\n")
+            f.write("# Please review these resources and move them into your main configuration files.\n\n")
+            f.write("\n".join(block for _, block in sorted(resources)))
+        print(f"Written {len(resources)} generated {resource_type} resources to {output_file}")
+
+    failed = [r for r in results if r["returncode"] != 0]
+    for result in failed:
+        first, last = result["blocks"][0], result["blocks"][-1]
+        print(f"Shard {result['index'] + 1}/{len(groups)} failed (exit {result['returncode']}, "
+              f"{len(result['blocks'])} imports from {first[0]}.{first[1]} to {last[0]}.{last[1]}):",
+              file=sys.stderr)
+        print(result["stderr"].strip()[-2000:], file=sys.stderr)
+
+    print(f"Config generation finished: {len(groups) - len(failed)}/{len(groups)} shards succeeded")
+    return not failed
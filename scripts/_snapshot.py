@@ -0,0 +1,308 @@
+"""Content-addressed cache of `terraform show -json` snapshots, keyed by state lineage and serial."""
+
+import os
+import sys
+import gzip
+import json
+import shutil
+import asyncio
+import hashlib
+from pathlib import Path
+from collections import defaultdict
+
+from ._terraform import TerraformRunner
+
+SNAPSHOT_DIR = ".terraform-snapshots"
+INDEX_FILE = "index.json"
+# Exported and pulled state is written here first (per process), then filed under its digest
+EXPORT_FILE = "export-{pid}.json.tmp"
+PULLED_STATE_FILE = "pulled-{pid}.tfstate"
+DEFAULT_TFC_HOST = "app.terraform.io"
+# Serials kept per lineage; older snapshots are deleted when a new one is stored
+KEEP_SERIALS = 5
+COPY_CHUNK_SIZE = 1 << 20
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(COPY_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Snapshots stored once per content digest, with an index from (lineage, serial) to digest.
+
+    Each snapshot is kept gzip-compressed as objects/<sha256>.json.gz, and
+    read back by decoding the compressed stream one resource at a time.
+    Tools that need a plain file get an uncompressed copy, written on first
+    use. Only the newest KEEP_SERIALS serials of each lineage are kept, and
+    only the newest serial keeps its uncompressed copy.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory) / SNAPSHOT_DIR
+        self.objects = self.directory / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.directory / INDEX_FILE
+        self.index = json.loads(self.index_file.read_text()) if self.index_file.exists() else {}
+        self.index.setdefault("snapshots", {})
+        self.index.setdefault("workspaces", {})
+
+    def _save_index(self):
+        _write_atomic(self.index_file, json.dumps(self.index, indent=2, sort_keys=True).encode())
+
+    def lookup(self, lineage: str, serial: int) -> str | None:
+        """Return the digest stored for this state version, if any."""
+        digest = self.index["snapshots"].get(f"{lineage}/{serial}")
+        if digest and (self.objects / f"{digest}.json.gz").exists():
+            return digest
+        return None
+
+    def put_file(self, source: Path) -> str:
+        """Store the contents of source under their sha256 digest (once) and return the digest.
+
+        source is compressed in chunks and removed.
+        """
+        digest = _file_digest(source)
+        blob = self.objects / f"{digest}.json.gz"
+        if not blob.exists():
+            tmp = blob.with_name(blob.name + ".tmp")
+            with open(source, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            os.replace(tmp, blob)
+        source.unlink()
+        return digest
+
+    def put(self, source: Path, lineage: str, serial: int) -> str:
+        """Store the contents of source and file them under this state version."""
+        digest = self.put_file(source)
+        self.index["snapshots"][f"{lineage}/{serial}"] = digest
+        self.prune()
+        self._save_index()
+        return digest
+
+    def prune(self, keep: int = KEEP_SERIALS):
+        """Drop all but the newest `keep` serials of each lineage, and unreferenced objects.
+
+        Uncompressed copies are kept only for the newest serial of each lineage.
+        """
+        by_lineage = defaultdict(list)
+        for key, digest in self.index["snapshots"].items():
+            lineage, _, serial = key.rpartition("/")
+            by_lineage[lineage].append((int(serial), key, digest))
+
+        kept, newest = set(), set()
+        for versions in by_lineage.values():
+            versions.sort(reverse=True)
+            for _, key, _ in versions[keep:]:
+                del self.index["snapshots"][key]
+            kept.update(digest for _, _, digest in versions[:keep])
+            newest.add(versions[0][2])
+
+        for blob in self.objects.glob("*.json.gz"):
+            if blob.name.removesuffix(".json.gz") not in kept:
+                blob.unlink(missing_ok=True)
+        for raw in self.objects.glob("*.json"):
+            if raw.stem not in newest:
+                raw.unlink(missing_ok=True)
+
+    def workspace(self, name: str) -> dict:
+        """Cached facts about a workspace (its id), kept in the index."""
+        return self.index["workspaces"].setdefault(name, {})
+
+    def save_workspace(self, name: str, **values):
+        self.index["workspaces"].setdefault(name, {}).update(values)
+        self._save_index()
+
+    def path(self, digest: str) -> Path:
+        """Path to the uncompressed snapshot, decompressing it on first use."""
+        path = self.objects / f"{digest}.json"
+        if not path.exists():
+            tmp = path.with_name(path.name + ".tmp")
+            with gzip.open(self.objects / f"{digest}.json.gz", 'rb') as src, open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            os.replace(tmp, path)
+        return path
+
+    def load(self, digest: str) -> dict:
+        """Decode the snapshot one resource at a time, without holding its text in memory."""
+        from .tfstate_projection import load_document
+
+        raw = self.objects / f"{digest}.json"
+        if raw.exists():
+            with open(raw, 'r', encoding='utf-8') as f:
+                return load_document(f)
+        with gzip.open(self.objects / f"{digest}.json.gz", 'rt', encoding='utf-8') as f:
+            return load_document(f)
+
+
+def _read_version(state_file: Path) -> tuple[str, int]:
+    """(lineage, serial) of a `terraform state pull` file, stepping over its resources undecoded."""
+    from .tfstate_projection import JsonStream
+
+    version = {"lineage": "", "serial": 0}
+    with open(state_file, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f)
+        missing = set(version)
+        for key in stream.object_items():
+            if key not in missing:
+                stream.skip()
+                continue
+            version[key] = stream.value()
+            missing.discard(key)
+            if not missing:
+                # Both come before the resources in terraform's output
+                break
+    return version["lineage"], int(version["serial"])
+
+
+class StateSnapshots:
+    """Serves the current state of an environment directory from the snapshot store.
+
+    The current (lineage, serial) is looked up cheaply first: with HCP
+    Terraform / Terraform Cloud credentials in the environment that is a
+    metadata request to the API, which neither downloads the state nor starts
+    terraform. A snapshot already stored for that version is served as is.
+    Otherwise `terraform show -json` runs once and its output is stored.
+    Without API credentials, `terraform state pull` provides the version, and
+    a snapshot that is not stored yet is exported from that same pulled state.
+    """
+
+    def __init__(self, directory: str, runner: TerraformRunner | None = None):
+        self.directory = Path(directory)
+        self.runner = runner
+        self.store = SnapshotStore(self.directory)
+        self._pulled = None  # file holding the state from the last `terraform state pull`
+
+    @staticmethod
+    def _tfc_token(host: str) -> str | None:
+        """The TF_TOKEN_<host> credential; the name is matched case-insensitively
+        (TF_TOKEN_APP_TERRAFORM_IO works as well as TF_TOKEN_app_terraform_io)."""
+        name = ("TF_TOKEN_" + host.replace("-", "__").replace(".", "_")).upper()
+        return next((value for key, value in os.environ.items() if key.upper() == name and value), None)
+
+    def _tfc_settings(self):
+        host = os.environ.get("TF_CLOUD_HOSTNAME", DEFAULT_TFC_HOST)
+        token = self._tfc_token(host)
+        organization = os.environ.get("TF_CLOUD_ORGANIZATION")
+        workspace = os.environ.get("TF_WORKSPACE")
+        environment_file = self.directory / ".terraform" / "environment"
+        if not workspace and environment_file.exists():
+            workspace = environment_file.read_text().strip()
+        if token and organization and workspace:
+            return host, token, organization, workspace
+        return None
+
+    def _tfc_get(self, host: str, token: str, path: str) -> dict:
+        import urllib.request  # pulls in ssl and http.client, only needed with API credentials
+
+        request = urllib.request.Request(f"https://{host}/api/v2/{path}", headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/vnd.api+json",
+        })
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.load(response)
+
+    def _remote_version_sync(self) -> tuple[str, int] | None:
+        settings = self._tfc_settings()
+        if not settings:
+            return None
+        host, token, organization, workspace = settings
+        cached = self.store.workspace(f"{organization}/{workspace}")
+        workspace_id = cached.get("id")
+        if not workspace_id:
+            workspace_id = self._tfc_get(host, token, f"organizations/{organization}/workspaces/{workspace}")["data"]["id"]
+            self.store.save_workspace(f"{organization}/{workspace}", id=workspace_id)
+
+        attributes = self._tfc_get(host, token, f"workspaces/{workspace_id}/current-state-version")["data"]["attributes"]
+        # Lineage is not always part of the state version resource; a workspace
+        # keeps one lineage in practice, so its id stands in
+        return attributes.get("lineage") or workspace_id, int(attributes["serial"])
+
+    async def version(self) -> tuple[str, int]:
+        """Return the current (lineage, serial) of the state."""
+        try:
+            version = await asyncio.to_thread(self._remote_version_sync)
+        except Exception as e:  # noqa: BLE001
+            print(f"Warning: could not query the state version from the API ({e}); using terraform state pull",
+                  file=sys.stderr)
+            version = None
+        if version:
+            self._drop_pulled()
+            return version
+
+        # Inside the environment directory, so the docker runner sees it through its mount
+        pulled_file = self.store.directory / PULLED_STATE_FILE.format(pid=os.getpid())
+        with open(pulled_file, 'wb') as f:
+            returncode, _, stderr = await self._runner().run("state", "pull", stdout=f)
+        if returncode != 0:
+            pulled_file.unlink(missing_ok=True)
+            raise RuntimeError(f"terraform state pull failed (exit {returncode}): {stderr.strip()}")
+        self._pulled = pulled_file
+        return await asyncio.to_thread(_read_version, pulled_file)
+
+    def _drop_pulled(self):
+        if self._pulled:
+            self._pulled.unlink(missing_ok=True)
+            self._pulled = None
+
+    async def _export(self, *args: str) -> Path:
+        """Run `terraform show -json [args]` into the export file."""
+        export_file = self.store.directory / EXPORT_FILE.format(pid=os.getpid())
+        try:
+            await self._runner().show_json(export_file, *args)
+        except BaseException:
+            export_file.unlink(missing_ok=True)
+            raise
+        return export_file
+
+    def _runner(self) -> TerraformRunner:
+        if not self.runner:
+            self.runner = TerraformRunner(str(self.directory))
+        return self.runner
+
+    async def changed(self) -> bool:
+        """Return True if no snapshot is stored for the current state version."""
+        lineage, serial = await self.version()
+        return self.store.lookup(lineage, serial) is None
+
+    async def current(self) -> str:
+        """Return the digest of a snapshot of the current state, fetching it if needed."""
+        lineage, serial = await self.version()
+        digest = self.store.lookup(lineage, serial)
+        if digest:
+            self._drop_pulled()
+            print(f"Using cached state snapshot (serial {serial})", file=sys.stderr)
+            return digest
+
+        if self._pulled is not None:
+            # The version was read from this pulled state, so the export matches it
+            try:
+                export_file = await self._export(self._pulled.relative_to(self.directory).as_posix())
+            finally:
+                self._drop_pulled()
+            print(f"Stored state snapshot (serial {serial})", file=sys.stderr)
+            return await asyncio.to_thread(self.store.put, export_file, lineage, serial)
+
+        export_file = await self._export()
+        if (lineage, serial) != await self.version():
+            # The state moved while it was being exported; serve this copy but do not file it under either version
+            print("Warning: state changed during export; snapshot not indexed", file=sys.stderr)
+            return await asyncio.to_thread(self.store.put_file, export_file)
+
+        print(f"Stored state snapshot (serial {serial})", file=sys.stderr)
+        return await asyncio.to_thread(self.store.put, export_file, lineage, serial)
+
+    async def load(self) -> dict:
+        return await asyncio.to_thread(self.store.load, await self.current())
+
+    async def path(self) -> Path:
+        return await asyncio.to_thread(self.store.path, await self.current())
@@ -0,0 +1,96 @@
+"""Run terraform for the importer, natively or in one long-lived container."""
+
+import os
+import sys
+import shutil
+import asyncio
+from pathlib import Path
+
+# The repo's wrapper consolidates subdirectory .tf files before running terraform
+WRAPPER = Path(__file__).resolve().parents[1] / "src" / "terraform.py"
+
+
+class TerraformRunner:
+    """Runs terraform commands for one environment directory.
+
+    "native" runs the repo's wrapper with the local terraform binary.
+    "docker" starts the compose `terraform` service once, idle, and runs
+    every command in it with `docker exec`, instead of paying container
+    startup for each step.
+    """
+
+    def __init__(self, directory: str, mode: str = "docker"):
+        if mode not in ("docker", "native"):
+            raise ValueError(f"Unsupported terraform mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.container = None
+        self._start_lock = asyncio.Lock()
+
+    async def _start_container(self):
+        async with self._start_lock:
+            if self.container:
+                return
+            name = f"okta-import-terraform-{os.getpid()}"
+            proc = await asyncio.create_subprocess_exec(
+                "docker", "compose", "run", "-d", "--rm", "--name", name,
+                "--entrypoint", "tail", "terraform", "-f", "/dev/null",
+                cwd=self.directory,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                raise RuntimeError(f"Failed to start terraform container: {stderr.decode().strip()}")
+            self.container = name
+
+    async def _command(self, args: list[str], workdir: str | None) -> list[str]:
+        """Build the argv for a terraform command run in workdir (default: the directory)."""
+        if self.mode == "native":
+            if not shutil.which("terraform"):
+                raise RuntimeError("terraform executable not found in PATH")
+            return [sys.executable, str(WRAPPER), *args]
+
+        await self._start_container()
+        container_dir = "/terraform"
+        if workdir:
+            # The environment directory is mounted at /terraform
+            container_dir = (Path(container_dir) / Path(workdir).relative_to(self.directory)).as_posix()
+        return ["docker", "exec", "-w", container_dir, self.container, "python", "/terraform.py", *args]
+
+    async def run(self, *args: str, workdir: str | None = None, stdout=None) -> tuple[int, bytes, str]:
+        """Run a terraform command; returns (returncode, stdout bytes, stderr text).
+
+        With stdout (an open binary file), output goes straight to that file
+        instead of being collected, and the returned stdout is empty.
+        """
+        argv = await self._command(list(args), workdir)
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            cwd=workdir or self.directory,
+            stdout=stdout if stdout is not None else asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        output, stderr = await proc.communicate()
+        return proc.returncode, output or b"", stderr.decode(errors="replace")
+
+    async def show_json(self, output_file: Path, *args: str):
+        """Write `terraform show -json [args]` output to output_file.
+
+        terraform writes the file directly, so the (possibly very large) JSON
+        never passes through this process's memory.
+        """
+        with open(output_file, 'wb') as f:
+            returncode, _, stderr = await self.run("show", "-json", *args, stdout=f)
+        if returncode != 0:
+            raise RuntimeError(f"terraform show failed (exit {returncode}): {stderr.strip()}")
+
+    async def close(self):
+        if self.container:
+            proc = await asyncio.create_subprocess_exec(
+                "docker", "rm", "-f", self.container,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await proc.wait()
+            self.container = None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import Time Budget Check
+
+Imports a CLI module in fresh interpreters with `python -X importtime` and
+fails if its cumulative import time exceeds a budget, or if it loads a module
+that must stay lazy (the Okta SDK and its dependencies are only imported once
+a fetch begins). The best of several runs is compared, to keep the check
+stable on busy CI machines.
+
+Usage:
+    uv run python scripts/check_import_time.py [--module scripts.importer] [--budget-ms 250] [--runs 5]
+
+Exits 1 if the budget is exceeded or a lazy module was imported at startup.
+"""
+
+import re
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULE = "scripts.importer"
+DEFAULT_BUDGET_MS = 250
+# Top-level packages that must not be imported just by loading the CLI
+LAZY_PACKAGES = ("okta", "pydantic", "aiohttp", "aiohttp_retry", "jwt")
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def import_profile(module: str) -> tuple[int, list[tuple[int, str]], list[str]]:
+    """Import module in a fresh interpreter.
+
+    Returns (cumulative microseconds for module, [(cumulative us, name)] of
+    its top-level imports, names of every module loaded).
+    """
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+
+    total = None
+    children = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if name == module:
+            total = int(cumulative)
+        elif len(indent) == 3:
+            children.append((int(cumulative), name))
+    if total is None:
+        raise RuntimeError(f"No importtime entry for {module}")
+    return total, children, json.loads(result.stdout)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Check the import time of a CLI module against a budget")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help=f"module to import (default {DEFAULT_MODULE})")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"cumulative import time budget in ms (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5, help="imports to run; the fastest is compared")
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point."""
+    args = parse_arguments()
+
+    profiles = [import_profile(args.module) for _ in range(max(args.runs, 1))]
+    total, children, modules = min(profiles, key=lambda p: p[0])
+    total_ms = total / 1000
+
+    print(f"{args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {len(profiles)})")
+    for cumulative, name in sorted(children, reverse=True)[:5]:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+    failed = False
+    loaded = sorted({m.split(".")[0] for m in modules} & set(LAZY_PACKAGES))
+    if loaded:
+        print(f"Error: importing {args.module} loads {', '.join(loaded)}, which must be imported lazily")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"Error: import time {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
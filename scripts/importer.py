@@ -6,68 +6,207 @@ This script uses the Okta Python SDK to generate Terraform import blocks for Okt
 It reads OAuth2 credentials from a terraform.tfvars.json file in the current working directory.
 
 Usage:
-    uv run okta-import [--type=<types>]
+    uv run okta-import [--type=<types>] [--incremental] [--full] [--terraform=<mode>] [--shards=<n>]
+                       [--waves[=<seconds>]] [--org-url=<url>] [--report=<file>] [--metrics=<file>]
+    uv run okta-import --drift [--type=<types>] [--terraform=<mode>]
 
     Where <types> is a comma-separated list of Okta resource types to process:
     - groups: Okta groups
     - users: Okta users
-    - apps: Okta applications
+    - apps: Okta applications (and group assignments, for apps that have any)
+    - memberships: Okta group memberships (okta_group_memberships)
+    - group_rules: Okta group rules
+    - app_users: Okta application user assignments (okta_app_user)
 
-    If no --type is specified, all resource types will be processed.
+    If no --type is specified, groups, users and apps will be processed.
+
+    --incremental  Keep a local cache of fetched entities (.okta-import-cache.sqlite)
+                   and only fetch users and groups updated since the last run.
+                   A full reconcile, which also drops deleted objects, runs at
+                   least once a week.
+    --full         With --incremental, force a full reconcile now.
+    --terraform    How terraform is run for the state export and config
+                   generation: "docker" (default) starts the compose
+                   `terraform` service once and reuses it for every step;
+                   "native" uses the local terraform binary.
+    --shards       Split the import blocks into <n> groups and run
+                   `plan -generate-config-out` for each group in parallel in
+                   its own working copy (with -lock=false). Generated config
+                   is merged into one generated_<type>.tf file per resource
+                   type. The default of 1 writes a single generated.tf.
+    --waves        Split the import blocks into waves that each plan in
+                   about <seconds> (default 600) and write only the first
+                   wave not yet applied, as okta-wave-NNN.import.tf, with its
+                   config generated into generated-wave-NNN.tf, so every
+                   wave gets its own PR and plan/apply. Waves are sized with
+                   the plan seconds per import measured on earlier config
+                   generation runs and recorded, with every wave's addresses,
+                   in .okta-import-waves.json. Re-running after a wave is
+                   applied marks it done and writes the next one. Cannot be
+                   combined with --shards.
+    --org-url      Use this Okta org URL instead of the one built from
+                   terraform.tfvars.json, e.g. a local okta_fake_server.py.
+    --report       Where to write the JSON run report (default
+                   .okta-import-report.json): Okta request counts, latency
+                   histograms, retries and rate-limit waits per endpoint,
+                   and per resource type the pages fetched and the time
+                   spent waiting on Okta, waiting on the terraform state
+                   and processing locally.
+    --metrics      Also write the same metrics to <file> in OpenMetrics
+                   text format.
+    --drift        Report drift instead of writing import blocks: Okta
+                   objects not managed by terraform (unmanaged), managed
+                   objects gone from Okta (deleted) and managed objects whose
+                   key attributes differ from state (modified). Uses the same
+                   paged list calls as an import, so a tenant-wide check takes
+                   a few dozen requests instead of a refreshing plan's one
+                   read per object. Supports groups, users and apps; writes
+                   .okta-drift-report.json and exits 2 when drift is found.
 
 Examples:
     cd preview && uv run okta-import
     cd production && uv run okta-import --type=groups
     cd preview && uv run okta-import --type=groups,users
+    cd preview && uv run okta-import --type=memberships,group_rules,app_users
+    cd preview && uv run okta-import --incremental
+    cd preview && uv run okta-import --terraform=native
+    cd preview && uv run okta-import --type=users --shards=8
+    cd production && uv run okta-import --type=users --waves=900
+    cd preview && uv run okta-import --metrics=okta-import.prom
+    cd production && uv run okta-import --drift
 
 The script will look for terraform.tfvars.json in the current working directory.
+
+The terraform state is exported while Okta is being crawled. Exports are
+cached in .terraform-snapshots/ by state serial (see state_snapshot.py), so
+re-running against an unchanged state does not run `terraform show` again.
+
+Import blocks are written page by page as they are fetched. If a run is
+interrupted, re-running the same command resumes each resource type from its
+last saved page instead of starting over.
 """
 
 import sys
 import json
+import time
 import asyncio
-import subprocess
 from pathlib import Path
-from .OktaTFImport import OktaTFImport
+from collections import Counter
+from .OktaTFImport import OktaTFImport, FETCHERS
+from ._terraform import TerraformRunner
+from ._snapshot import StateSnapshots
+from ._generate import generate_config_sharded, collect_import_blocks
+
+# Resource types processed when --type is not given
+DEFAULT_TYPES = ['groups', 'users', 'apps']
+REPORT_FILE = '.okta-import-report.json'
+DRIFT_REPORT_FILE = '.okta-drift-report.json'
+# Drift entries printed per category; the JSON report has all of them
+DRIFT_PRINT_LIMIT = 20
 
-def parse_arguments() -> tuple[str, list[str]]:
+def parse_arguments() -> tuple[str, list[str], dict]:
     """Parse command line arguments."""
     # Use current working directory
     directory = str(Path.cwd())
 
     # Parse type argument
     resource_types = []
+    options = {'incremental': False, 'full': False, 'terraform': 'docker', 'shards': 1, 'org_url': None,
+               'report': REPORT_FILE, 'metrics': None, 'drift': False, 'waves': None}
     for arg in sys.argv[1:]:
         if arg.startswith('--type='):
             types_str = arg.split('=', 1)[1]
             resource_types = [t.strip().lower() for t in types_str.split(',')]
-            break
+        elif arg == '--incremental':
+            options['incremental'] = True
+        elif arg == '--full':
+            options['full'] = True
+        elif arg == '--drift':
+            options['drift'] = True
+        elif arg.startswith('--terraform='):
+            options['terraform'] = arg.split('=', 1)[1].strip().lower()
+        elif arg.startswith('--org-url='):
+            options['org_url'] = arg.split('=', 1)[1].strip().rstrip('/')
+        elif arg.startswith('--report='):
+            options['report'] = arg.split('=', 1)[1].strip()
+        elif arg.startswith('--metrics='):
+            options['metrics'] = arg.split('=', 1)[1].strip()
+        elif arg == '--waves':
+            options['waves'] = 0
+        elif arg.startswith('--waves='):
+            try:
+                options['waves'] = float(arg.split('=', 1)[1])
+            except ValueError:
+                options['waves'] = -1
+            if options['waves'] <= 0:
+                print("Error: --waves must be a positive number of seconds")
+                sys.exit(1)
+        elif arg.startswith('--shards='):
+            try:
+                options['shards'] = int(arg.split('=', 1)[1])
+            except ValueError:
+                options['shards'] = 0
+            if options['shards'] < 1:
+                print("Error: --shards must be a positive integer")
+                sys.exit(1)
         elif arg in ['--help', '-h']:
-            print("Usage: uv run okta-import [--type=<types>]")
+            print("Usage: uv run okta-import [--type=<types>] [--incremental] [--full] [--terraform=<mode>] [--shards=<n>]")
+            print("                          [--waves[=<seconds>]] [--org-url=<url>] [--report=<file>] [--metrics=<file>]")
+            print("       uv run okta-import --drift [--type=<types>] [--terraform=<mode>]")
             print("\nWhere <types> is a comma-separated list of Okta resources to read")
             print("\nSupported types:")
-            print("  groups    - Okta groups")
-            print("  users     - Okta users")
-            print("  apps      - Okta applications")
+            for name, fetcher in FETCHERS.items():
+                print(f"  {name:<12}- {fetcher['description']}")
+            print("\nOptions:")
+            print("  --incremental  Only fetch entities changed since the last run, using a local cache")
+            print("  --full         With --incremental, force a full reconcile")
+            print("  --terraform    docker (default, one reused container) or native (local terraform)")
+            print("  --shards       Generate config in <n> parallel plan shards (default 1)")
+            print("  --waves        Write one import wave at a time, each planning in about <seconds> (default 600)")
+            print("  --org-url      Override the Okta org URL (e.g. a local fake Okta server)")
+            print(f"  --report       JSON run report with request metrics (default {REPORT_FILE})")
+            print("  --metrics      Also write the metrics in OpenMetrics text format")
+            print(f"  --drift        Report unmanaged, deleted and modified objects (writes {DRIFT_REPORT_FILE})")
             print("\nExamples:")
             print("  cd preview && uv run okta-import")
             print("  cd production && uv run okta-import --type=groups")
             print("  cd preview && uv run okta-import --type=groups,users")
+            print("  cd preview && uv run okta-import --incremental")
             sys.exit(0)
+        else:
+            print(f"Error: Unknown argument: {arg}")
+            sys.exit(1)
 
-    # If no types specified, default to all supported types
+    # If no types specified, default to the core resource types
     if not resource_types:
-        resource_types = ['groups', 'users', 'apps']
+        resource_types = DEFAULT_TYPES
 
     # Validate resource types
-    supported_types = {'groups', 'users', 'apps'}
-    invalid_types = set(resource_types) - supported_types
+    supported_types = list(FETCHERS)
+    invalid_types = set(resource_types) - set(supported_types)
     if invalid_types:
         print(f"Error: Unsupported resource types: {', '.join(invalid_types)}")
         print(f"Supported types: {', '.join(supported_types)}")
         sys.exit(1)
 
-    return directory, resource_types
+    if options['drift']:
+        unsupported = [t for t in resource_types if FETCHERS[t]['drift'] is None]
+        if unsupported:
+            print(f"Error: --drift does not support: {', '.join(unsupported)}")
+            print(f"Supported types: {', '.join(t for t, f in FETCHERS.items() if f['drift'] is not None)}")
+            sys.exit(1)
+
+    if options['waves'] is not None and options['shards'] > 1:
+        # Shards merge config into generated_<type>.tf rather than the wave's own file
+        print("Error: --waves cannot be combined with --shards")
+        sys.exit(1)
+
+    if options['terraform'] not in ('docker', 'native'):
+        print(f"Error: Unsupported terraform mode: {options['terraform']}")
+        print("Supported modes: docker, native")
+        sys.exit(1)
+
+    return directory, resource_types, options
 
 def read_terraform_config(directory: str) -> dict:
     """Read the terraform plan configuration from the specified directory."""
@@ -80,42 +219,84 @@ def read_terraform_config(directory: str) -> dict:
         print(f"Error: terraform.tfvars.json not found in {directory}")
         sys.exit(1)
 
-def export_terraform_state(directory: str) -> str | None:
-    """Export current terraform state to JSON."""
-    try:
-        result = subprocess.run(
-            ["docker", "compose", "run", "--rm", "terraform", "show", "--json"],
-            cwd=directory,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+async def export_terraform_state(runner: TerraformRunner) -> dict:
+    """Return the current terraform state as parsed `terraform show -json` output.
 
-        output_file = Path(directory) / "terraform.tfstate"
-        with open(output_file, 'w') as f:
-            f.write(result.stdout)
-            print(f"Terraform state exported to {output_file}")
-        return output_file
-    except subprocess.CalledProcessError as e:
-        print(f"Error exporting terraform state: {e.stderr}", file=sys.stderr)
-        return None
-    except json.JSONDecodeError as e:
-        print(f"Error parsing terraform state JSON: {str(e)}", file=sys.stderr)
-        return None
-    
-def generate_terraform_config(directory: str) -> None:
-    """Generate terraform config from import blocks."""
-    try:
-        generated_file = "generated.tf"
-        subprocess.run(
-            ["docker", "compose", "run", "--rm", "terraform", "plan", f"-generate-config-out={generated_file}"],
-            cwd=directory,
-            capture_output=True,
-            text=True,
-            check=False
+    Served from the local snapshot cache when the state serial is unchanged.
+    """
+    state = await StateSnapshots(runner.directory, runner).load()
+    print("Terraform state exported")
+    return state
+
+def print_drift_report(results: dict) -> int:
+    """Print a drift summary per resource type; returns the number of drifted objects."""
+    total = 0
+    for name, report in results.items():
+        drifted = len(report['unmanaged']) + len(report['deleted']) + len(report['modified'])
+        total += drifted
+        print(f"\n{name}: {report['managed']} managed, {len(report['unmanaged'])} unmanaged, "
+              f"{len(report['deleted'])} deleted, {len(report['modified'])} modified")
+
+        # Changes to managed objects first; unmanaged objects are usually the long tail
+        entries = (
+            [f"  ~ modified  {r['address']}: " + ", ".join(
+                f"{key} {change['state']!r} -> {change['live']!r}" for key, change in r['changes'].items())
+             for r in report['modified']]
+            + [f"  - deleted   {r['address']} ({r['id']})" for r in report['deleted']]
+            + [f"  + unmanaged {r['type']} {r['id']} ({r['name']})" for r in report['unmanaged']]
         )
-    except subprocess.CalledProcessError as e:
-        print(f"Error generating terraform config: {e.stderr}", file=sys.stderr)
+        for entry in entries[:DRIFT_PRINT_LIMIT]:
+            print(entry)
+        if len(entries) > DRIFT_PRINT_LIMIT:
+            print(f"  ... and {len(entries) - DRIFT_PRINT_LIMIT} more")
+    return total
+
+async def run_drift(okta: OktaTFImport, state, resource_types: list[str], directory: str) -> int:
+    """Run a drift check and write its report; returns the process exit code."""
+    print(f"\n{'='*60}")
+    print(f"Checking drift for {', '.join(t.upper() for t in resource_types)}")
+    print(f"{'='*60}")
+
+    results = await okta.drift(resource_types, state)
+    await okta.close()
+
+    drifted = print_drift_report(results)
+    report_file = Path(directory) / DRIFT_REPORT_FILE
+    with open(report_file, 'w') as f:
+        json.dump({"types": results, "metrics": okta.metrics.report()}, f, indent=2)
+    print(f"\nDrift report written to {report_file}")
+    print(f"{okta.metrics.report()['totals']['requests']} Okta requests")
+
+    if drifted:
+        print(f"Drift detected: {drifted} objects")
+        return 2
+    print("No drift detected")
+    return 0
+
+async def generate_terraform_config(runner: TerraformRunner, generated_file: str = "generated.tf") -> bool:
+    """Generate terraform config from import blocks; returns True on success.
+
+    terraform refuses to overwrite generated_file, so if it already exists
+    (a wave re-run while its PR is open) the import blocks are only planned.
+    """
+    if (Path(runner.directory) / generated_file).exists():
+        print(f"{generated_file} already exists; planning the imports without generating config")
+        returncode, _, stderr = await runner.run("plan", "-input=false")
+    else:
+        returncode, _, stderr = await runner.run("plan", f"-generate-config-out={generated_file}")
+    if returncode != 0:
+        print(f"Error generating terraform config: {stderr}", file=sys.stderr)
+    return returncode == 0
+
+def print_wave_summary(manifest) -> None:
+    wave = manifest.current()
+    applied = sum(1 for w in manifest.waves if w['status'] == 'applied')
+    if not wave:
+        print(f"All {applied} import waves are applied")
+        return
+    print(f"Wave {wave['wave']}: {len(wave['imports'])} imports (about {manifest.estimate(wave['imports']):.0f}s "
+          f"to plan) written to {wave['file']}; {applied} waves applied, "
+          f"{len(manifest.waves) - applied - 1} more pending")
 
 async def main():
     """Main function to run the Okta terraform import tool."""
@@ -124,7 +305,7 @@ async def main():
 
     try:
         # Parse command line arguments
-        directory, resource_types = parse_arguments()
+        directory, resource_types, options = parse_arguments()
 
         print(f"Processing resource types: {', '.join(resource_types)}")
         print(f"Output directory: {directory}")
@@ -140,7 +321,7 @@ async def main():
         scopes = tfvars['okta_api_scopes']
 
         config = {
-            "orgUrl": f"https://{org_name}.{base_url}",
+            "orgUrl": options['org_url'] or f"https://{org_name}.{base_url}",
             "authorizationMode": "PrivateKey",
             "clientId": client_id,
             "privateKey": private_key,
@@ -149,40 +330,70 @@ async def main():
             "logging": {"enabled": False},
         }
         
-        # Export current terraform state to JSON
-        state_file = export_terraform_state(directory)
-
         # Initialize the OktaTFImport for the directory
         okta = OktaTFImport(
             directory=directory,
             config=config,
-            state_file=state_file
+            incremental=options['incremental'],
+            full_reconcile=options['full'],
+            waves=options['waves'] is not None,
         )
 
-        # Process each resource type (skipping ones already in state)
-        for resource_type in resource_types:
+        # Export the current terraform state while Okta is being crawled
+        runner = TerraformRunner(directory, mode=options['terraform'])
+        state = asyncio.create_task(export_terraform_state(runner))
+
+        try:
+            if options['drift']:
+                exit_code = await run_drift(okta, state, resource_types, directory)
+                sys.exit(exit_code)
+
+            # Process all resource types concurrently (skipping ones already in state)
             print(f"\n{'='*60}")
-            print(f"Processing {resource_type.upper()}")
+            print(f"Processing {', '.join(t.upper() for t in resource_types)}")
             print(f"{'='*60}")
 
-            if resource_type == 'groups':
-                await okta.process_groups()
-            elif resource_type == 'users':
-                await okta.process_users()
-            elif resource_type == 'apps':
-                await okta.process_apps()
+            await okta.process(resource_types, state=state)
+            manifest = None
+            if options['waves'] is not None:
+                manifest = okta.emit_wave(resource_types, options['waves'] or None)
+                print_wave_summary(manifest)
+
+            print(f"\n{'='*60}")
+            print("PROCESSING COMPLETE")
+            print(f"{'='*60}")
+            print(f"Terraform import files have been written to the '{directory}' directory.")
+            print("You can now run 'terraform plan -generate-config-out' to see what resources will be imported.")
 
-        print(f"\n{'='*60}")
-        print("PROCESSING COMPLETE")
-        print(f"{'='*60}")
-        print(f"Terraform import files have been written to the '{directory}' directory.")
-        print("You can now run 'terraform plan -generate-config-out' to see what resources will be imported.")
+            # Close the client
+            await okta.close()
+            okta.write_report(Path(directory) / options['report'],
+                              Path(directory) / options['metrics'] if options['metrics'] else None)
 
-        # Close the client
-        await okta.close()
+            # A failed type leaves its previous import file in place, so generating
+            # config now would plan a mix of stale and fresh import blocks
+            if okta.failed:
+                print(f"Error: failed to import {', '.join(sorted(okta.failed))}; "
+                      "skipping config generation", file=sys.stderr)
+                sys.exit(1)
 
-        # Generate terraform config
-        generate_terraform_config(directory)
+            # Generate terraform config
+            if options['shards'] > 1:
+                generated = await generate_config_sharded(runner, directory, options['shards'])
+            else:
+                # The plan covers every pending import block, which with --waves is
+                # the current wave, so its duration measures the per-import plan cost
+                counts = Counter(resource_type for resource_type, _, _ in collect_import_blocks(Path(directory)))
+                wave = manifest.current() if manifest else None
+                started = time.perf_counter()
+                generated = await generate_terraform_config(runner, wave['generated'] if wave else "generated.tf")
+                if generated and manifest and counts:
+                    manifest.record_plan(time.perf_counter() - started, counts)
+                    manifest.save()
+            if not generated:
+                sys.exit(1)
+        finally:
+            await runner.close()
 
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Okta Importer Throughput Benchmark
+
+Runs the full OktaTFImport path (fetch, de-duplicate, write import blocks)
+against a local fake Okta org and reports entities/sec, request count and
+peak memory.
+
+Usage:
+    uv run python -m scripts.importer_benchmark [--type=users,groups,apps] [--concurrency 4]
+                                                [--users 50000] [--latency 0.05] [--json report.json]
+
+Accepts the same dataset options as okta_fake_server.py.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+from .okta_fake_server import add_dataset_arguments, server_from_args
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _count_blocks(directory: Path) -> dict:
+    return {
+        import_file.name.removesuffix(".import.tf"): import_file.read_text().count("import {")
+        for import_file in sorted(directory.glob("*.import.tf"))
+    }
+
+
+async def run_benchmark(args) -> dict:
+    from .OktaTFImport import OktaTFImport
+    # The importer loads the SDK lazily; load it now so it is part of the baseline
+    # memory figure and not of the timed run
+    import okta.client  # noqa: F401
+
+    server = server_from_args(args)
+    server.start()
+    baseline_mb = _peak_rss_mb()
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            config = {
+                "orgUrl": server.url,
+                "authorizationMode": "SSWS",
+                "token": "fake",
+                "logging": {"enabled": False},
+            }
+            okta = OktaTFImport(directory=directory, config=config, max_concurrency=args.concurrency)
+
+            start = time.perf_counter()
+            await okta.process(args.types, state={})
+            elapsed = time.perf_counter() - start
+            await okta.close()
+            metrics = okta.metrics.report()
+
+            blocks = _count_blocks(Path(directory))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    entities = sum(blocks.values())
+    return {
+        "types": args.types,
+        "concurrency": args.concurrency,
+        "dataset": {"users": args.users, "groups": args.groups, "apps": args.apps, "rules": args.rules},
+        "latency": args.latency,
+        "seconds": round(elapsed, 3),
+        "entities": entities,
+        "entities_per_second": round(entities / elapsed, 1) if elapsed else None,
+        "blocks": blocks,
+        "requests": server.requests,
+        "baseline_rss_mb": round(baseline_mb, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "metrics": metrics,
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the Okta importer against a fake Okta org")
+    parser.add_argument("--type", dest="types", default="groups,users,apps",
+                        type=lambda s: [t.strip() for t in s.split(",") if t.strip()],
+                        help="comma-separated resource types to import")
+    parser.add_argument("--concurrency", type=int, default=4, help="max in-flight Okta requests")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+
+    print(f"\n{'='*60}")
+    print("BENCHMARK RESULTS")
+    print(f"{'='*60}")
+    print(f"Entities:      {report['entities']} ({', '.join(f'{k}={v}' for k, v in report['blocks'].items())})")
+    print(f"Requests:      {report['requests']} ({report['metrics']['totals']['retries']} retried, "
+          f"{report['metrics']['totals']['rate_limit_wait_seconds']}s waiting on rate limits)")
+    print(f"Elapsed:       {report['seconds']}s")
+    print(f"Throughput:    {report['entities_per_second']} entities/sec")
+    print(f"Peak RSS:      {report['peak_rss_mb']} MiB (baseline {report['baseline_rss_mb']} MiB)")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
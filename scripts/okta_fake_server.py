@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Fake Okta API Server
+
+A local stand-in for the parts of the Okta management API the importer uses,
+for offline throughput and regression testing. Serves generated users, groups,
+apps, group rules, group members and app assignments with cursor `Link`
+pagination, configurable per-page latency, `X-Rate-Limit-*` headers and 429
+responses once a bucket's budget is spent.
+
+Usage:
+    python okta_fake_server.py [--port 8555] [--users 50000] [--groups 5000] [--apps 300]
+                               [--latency 0.05] [--rate-limit 600] [--error-rate 0.01]
+
+Point the importer at it with `--org-url=http://127.0.0.1:8555`, or run
+`importer_benchmark.py`, which starts one automatically.
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SIGN_ON_MODES = ["SAML_2_0", "OPENID_CONNECT", "BOOKMARK", "AUTO_LOGIN", "SECURE_PASSWORD_STORE"]
+SINCE_PATTERN = re.compile(r'lastUpdated gt "([^"]+)"')
+
+# Largest page size each endpoint accepts, as in the real API
+MAX_LIMITS = {
+    "users": 200,
+    "groups": 10000,
+    "apps": 200,
+    "group_rules": 200,
+    "group_users": 1000,
+    "app_users": 500,
+    "app_groups": 200,
+}
+
+
+def _okta_id(prefix: str, index: int) -> str:
+    return f"{prefix}{index:017d}"
+
+
+def _timestamp(index: int) -> str:
+    return (BASE_TIME + timedelta(seconds=index)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+class FakeOktaData:
+    """Deterministic dataset generated on demand from its configured sizes."""
+
+    def __init__(self, users: int, groups: int, apps: int, rules: int, members_per_group: int,
+                 users_per_app: int):
+        self.users = users
+        self.groups = groups
+        self.apps = apps
+        self.rules = rules
+        self.members_per_group = members_per_group
+        self.users_per_app = users_per_app
+
+    def user(self, i: int) -> dict:
+        return {
+            "id": _okta_id("00u", i),
+            "status": "ACTIVE",
+            "created": _timestamp(i),
+            "lastUpdated": _timestamp(i),
+            "profile": {
+                "login": f"user{i}@example.com",
+                "email": f"user{i}@example.com",
+                "firstName": "User",
+                "lastName": str(i),
+            },
+        }
+
+    def group(self, i: int) -> dict:
+        return {
+            "id": _okta_id("00g", i),
+            "type": "OKTA_GROUP",
+            "lastUpdated": _timestamp(i),
+            "profile": {"name": f"app{i % 50}_role{i}", "description": ""},
+        }
+
+    def app(self, i: int) -> dict:
+        return {
+            "id": _okta_id("0oa", i),
+            "name": f"fake_app_{i}",
+            "label": f"Fake App {i}",
+            "status": "ACTIVE",
+            "signOnMode": SIGN_ON_MODES[i % len(SIGN_ON_MODES)],
+            "lastUpdated": _timestamp(i),
+        }
+
+    def rule(self, i: int) -> dict:
+        return {
+            "id": _okta_id("0pr", i),
+            "type": "group_rule",
+            "name": f"Rule {i}",
+            "status": "ACTIVE",
+            "lastUpdated": _timestamp(i),
+        }
+
+    def app_user(self, i: int) -> dict:
+        user = self.user(i)
+        return {"id": user["id"], "scope": "USER", "credentials": {"userName": user["profile"]["login"]}}
+
+    def app_group(self, i: int) -> dict:
+        return {"id": _okta_id("00g", i), "priority": 0}
+
+    def collection(self, path: str):
+        """Resolve a request path to (bucket, item count, item builder), or None."""
+        parts = [p for p in path.split("/") if p][2:]  # drop "api", "v1"
+        match parts:
+            case ["users"]:
+                return "users", self.users, self.user
+            case ["groups"]:
+                return "groups", self.groups, self.group
+            case ["groups", "rules"]:
+                return "group_rules", self.rules, self.rule
+            case ["groups", group_id, "users"]:
+                # Every other group has members
+                count = self.members_per_group if int(group_id[3:]) % 2 == 0 else 0
+                return "group_users", min(count, self.users), self.user
+            case ["apps"]:
+                return "apps", self.apps, self.app
+            case ["apps", app_id, "users"]:
+                return "app_users", min(self.users_per_app, self.users), self.app_user
+            case ["apps", app_id, "groups"]:
+                # Every third app has group assignments
+                count = 3 if int(app_id[3:]) % 3 == 0 else 0
+                return "app_groups", min(count, self.groups), self.app_group
+        return None
+
+
+class RateLimiter:
+    """Per-bucket fixed-window request budget, like Okta's per-endpoint limits."""
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._buckets = {}  # bucket -> [window reset epoch, requests used]
+
+    def take(self, bucket: str) -> tuple[bool, int, int]:
+        """Consume one request; returns (allowed, remaining, reset epoch)."""
+        with self._lock:
+            now = time.time()
+            reset, used = self._buckets.get(bucket, (0, 0))
+            if now >= reset:
+                reset, used = now + self.window, 0
+            allowed = used < self.limit
+            if allowed:
+                used += 1
+            self._buckets[bucket] = (reset, used)
+            return allowed, self.limit - used, int(reset) + 1
+
+
+class FakeOktaHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOkta/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body, headers: dict | None = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, code: str, summary: str, headers: dict | None = None):
+        self._send_json(status, {
+            "errorCode": code,
+            "errorSummary": summary,
+            "errorLink": code,
+            "errorId": f"fake{random.getrandbits(32):08x}",
+            "errorCauses": [],
+        }, headers)
+
+    def do_POST(self):
+        # Accept any client assertion so PrivateKey auth works against the fake org
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if urlparse(self.path).path.rstrip("/") == "/oauth2/v1/token":
+            self._send_json(200, {"access_token": "fake", "token_type": "Bearer",
+                                  "expires_in": 3600, "scope": "okta.users.read"})
+        else:
+            self._error(404, "E0000022", "The endpoint does not support the provided HTTP method")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        resolved = self.server.data.collection(url.path.rstrip("/"))
+        if not resolved:
+            self._error(404, "E0000007", f"Not found: Resource not found: {url.path}")
+            return
+
+        bucket, total, build = resolved
+        self.server.count_request()
+        allowed, remaining, reset = self.server.rate_limiter.take(bucket)
+        headers = {
+            "X-Rate-Limit-Limit": str(self.server.rate_limiter.limit),
+            "X-Rate-Limit-Remaining": str(max(remaining, 0)),
+            "X-Rate-Limit-Reset": str(reset),
+        }
+        if not allowed:
+            self._error(429, "E0000047", "API call exceeded rate limit due to too many requests.", headers)
+            return
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._error(503, "E0000009", "Internal Server Error", headers)
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        limit = min(int(query.get("limit", MAX_LIMITS[bucket])), MAX_LIMITS[bucket])
+        start = int(query["after"]) if query.get("after", "").isdigit() else 0
+
+        since = SINCE_PATTERN.search(query.get("search", ""))
+        if since:
+            # Items are timestamped one second apart, so the filter maps to an index
+            cutoff = datetime.strptime(since.group(1), '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+            start = max(start, int((cutoff - BASE_TIME).total_seconds()) + 1)
+
+        end = min(start + limit, total)
+        items = [build(i) for i in range(start, end)]
+
+        base = f"http://{self.headers.get('Host')}{url.path}"
+        links = [f'<{base}?{urlencode({**query, "limit": limit})}>; rel="self"']
+        if end < total:
+            links.append(f'<{base}?{urlencode({**query, "limit": limit, "after": end})}>; rel="next"')
+        headers["Link"] = ", ".join(links)
+        self._send_json(200, items, headers)
+
+
+class FakeOktaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, data: FakeOktaData, latency: float = 0.0, rate_limit: int = 600,
+                 error_rate: float = 0.0, verbose: bool = False):
+        super().__init__(address, FakeOktaHandler)
+        self.data = data
+        self.latency = latency
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+
+    def count_request(self):
+        with self._requests_lock:
+            self.requests += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve in a background thread (for benchmarks and tests)."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser):
+    """Add the dataset and behaviour options shared with the benchmark."""
+    parser.add_argument("--users", type=int, default=1000, help="number of users")
+    parser.add_argument("--groups", type=int, default=200, help="number of groups")
+    parser.add_argument("--apps", type=int, default=50, help="number of apps")
+    parser.add_argument("--rules", type=int, default=20, help="number of group rules")
+    parser.add_argument("--members-per-group", type=int, default=25, help="members in every other group")
+    parser.add_argument("--users-per-app", type=int, default=10, help="users assigned to each app")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of latency per page")
+    parser.add_argument("--rate-limit", type=int, default=600, help="requests per minute per endpoint bucket")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+
+
+def server_from_args(args, port: int = 0) -> FakeOktaServer:
+    data = FakeOktaData(args.users, args.groups, args.apps, args.rules, args.members_per_group,
+                        args.users_per_app)
+    return FakeOktaServer(("127.0.0.1", port), data, latency=args.latency, rate_limit=args.rate_limit,
+                          error_rate=args.error_rate, verbose=getattr(args, "verbose", False))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Fake Okta API server for importer testing")
+    parser.add_argument("--port", type=int, default=8555, help="port to listen on")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, port=args.port)
+    print(f"Fake Okta org listening on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,253 @@
+#!/usr/bin/env python3
+"""
+Sailpoint Coverage
+
+Measures how many of the Okta groups managed by Terraform are known to
+Sailpoint as group entitlements.
+
+Usage:
+    uv run --env-file .env sailpoint_coverage.py --state=<state.json> [--workers=8] [--output=<report.json>]
+    uv run sailpoint_coverage.py --state=<state.json> --fixture=<entitlements.jsonl>
+    uv run --env-file .env sailpoint_coverage.py [--stream]
+
+With --state, the Okta group entitlements are fetched from Sailpoint with
+concurrent offset pages and their native ids (the Okta group ids) are joined
+against the okta_group resources in a Terraform state snapshot, from either
+`terraform show -json` or `terraform state pull`. The result lists groups
+that are:
+    covered    managed by Terraform and present in Sailpoint
+    uncovered  managed by Terraform but missing from Sailpoint
+    orphaned   present in Sailpoint but not managed by Terraform
+and the coverage percentage used for the badge (covered / managed).
+
+--fixture reads entitlements from a JSON array or JSON lines file (such as
+--stream output) instead of calling Sailpoint; it needs --state. Pointing
+SAIL_BASE_URL at a local stand-in server also works.
+
+Without --state, only the total is requested: a single call with
+`count=true` whose X-Total-Count header holds the number of matching
+entitlements. --stream instead walks every page and prints each entitlement
+as a JSON line, holding one page in memory at a time and with no cap on the
+number of results.
+
+Set SAIL_OKTA_SOURCE_ID to the id of the Okta source in Sailpoint.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from sailpoint.configuration import Configuration
 from sailpoint.v2025.api_client import ApiClient
-from sailpoint.paginator import Paginator
 from sailpoint.v2025.api.entitlements_api import EntitlementsApi
+from sailpoint.v2025.exceptions import ApiException
+
+# Largest page size the entitlements endpoint accepts
+PAGE_LIMIT = 250
+# Rate limiting and transient server errors are retried
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+
+
+def okta_group_filter(source_id: str) -> str:
+    return f'source.id eq "{source_id}" and type eq "group"'
+
+
+def count_entitlements(api: EntitlementsApi, filters: str) -> int:
+    """Return the number of entitlements matching filters with one request."""
+    response = api.list_entitlements_with_http_info(filters=filters, limit=1, count=True)
+    headers = {k.lower(): v for k, v in (response.headers or {}).items()}
+    if 'x-total-count' not in headers:
+        raise RuntimeError("Sailpoint response did not include X-Total-Count")
+    return int(headers['x-total-count'])
+
+
+def iter_entitlements(api: EntitlementsApi, filters: str, page_size: int = PAGE_LIMIT) -> Iterator:
+    """Yield every entitlement matching filters, one page at a time.
+
+    Pages are requested by offset until a short page comes back, so there is
+    no upper bound on the number of results and only the current page is
+    held in memory.
+    """
+    offset = 0
+    while True:
+        page = api.list_entitlements(filters=filters, offset=offset, limit=page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def fetch_page(api: EntitlementsApi, filters: str, offset: int, limit: int = PAGE_LIMIT) -> list:
+    """Fetch one page of entitlements, retrying 429/5xx with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            # A fixed sort order keeps concurrent offset pages from overlapping
+            return api.list_entitlements(filters=filters, offset=offset, limit=limit, sorters="id")
+        except ApiException as e:
+            if e.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                raise
+            headers = {k.lower(): v for k, v in (e.headers or {}).items()}
+            retry_after = headers.get('retry-after', '')
+            delay = float(retry_after) if retry_after.isdigit() else min(2 ** attempt, 30)
+            time.sleep(delay + random.uniform(0, 0.5))
+
+
+def fetch_group_ids(api: EntitlementsApi, filters: str, workers: int = 8) -> set[str]:
+    """Return the native ids of every entitlement matching filters.
+
+    The total count is requested first, then every page is fetched
+    concurrently by offset with at most `workers` requests in flight. Only
+    the ids are kept, so memory does not grow with the entitlement payloads.
+    If entitlements were added while paging, the remaining pages are read
+    one by one until a short page comes back.
+    """
+    total = count_entitlements(api, filters)
+    offsets = range(0, total, PAGE_LIMIT)
+    ids = set()
+    if not offsets:
+        return ids
+    last_page_full = False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_page, api, filters, offset): offset for offset in offsets}
+        for future in as_completed(futures):
+            page = future.result()
+            ids.update(e.value for e in page if e.value)
+            if futures[future] == offsets[-1]:
+                last_page_full = len(page) == PAGE_LIMIT
+
+    offset = len(offsets) * PAGE_LIMIT
+    while last_page_full:
+        page = fetch_page(api, filters, offset)
+        ids.update(e.value for e in page if e.value)
+        last_page_full = len(page) == PAGE_LIMIT
+        offset += PAGE_LIMIT
+
+    return ids
+
+
+def load_fixture(path: Path) -> set[str]:
+    """Read entitlement native ids from a JSON array or JSON lines file."""
+    text = path.read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        entitlements = json.loads(text)
+    else:
+        entitlements = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return {e["value"] for e in entitlements if e.get("value")}
+
+
+def terraform_group_ids(state: dict) -> set[str]:
+    """Return the ids of every managed okta_group in a state snapshot.
+
+    Accepts `terraform show -json` output (values.root_module, including
+    child modules) and `terraform state pull` output (top-level resources).
+    """
+    ids = set()
+
+    if "values" in state:
+        modules = [state["values"].get("root_module", {})]
+        while modules:
+            module = modules.pop()
+            modules.extend(module.get("child_modules", []))
+            for resource in module.get("resources", []):
+                if resource.get("mode") == "managed" and resource.get("type") == "okta_group":
+                    ids.add(resource.get("values", {}).get("id"))
+
+    for resource in state.get("resources", []):
+        if resource.get("mode") == "managed" and resource.get("type") == "okta_group":
+            for instance in resource.get("instances", []):
+                ids.add(instance.get("attributes", {}).get("id"))
+
+    ids.discard(None)
+    return ids
+
+
+def coverage(managed: set[str], sailpoint: set[str]) -> dict:
+    """Join Terraform-managed group ids against Sailpoint entitlement ids."""
+    covered = managed & sailpoint
+    return {
+        "managed": len(managed),
+        "sailpoint": len(sailpoint),
+        "percentage": round(100 * len(covered) / len(managed), 1) if managed else 0.0,
+        "covered": sorted(covered),
+        "uncovered": sorted(managed - sailpoint),
+        "orphaned": sorted(sailpoint - managed),
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Sailpoint coverage of Terraform-managed Okta groups")
+    parser.add_argument("--state", type=Path, help="terraform show -json or state pull snapshot to join against")
+    parser.add_argument("--fixture", type=Path, help="read entitlements from this file instead of Sailpoint")
+    parser.add_argument("--output", type=Path, help="write the coverage report (with group id lists) as JSON")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent Sailpoint page requests")
+    parser.add_argument("--stream", action="store_true", help="print every entitlement as a JSON line")
+    args = parser.parse_args()
+    if args.fixture and not args.state:
+        # Fixture entitlements are only joined against a state, never listed
+        parser.error("--fixture requires --state")
+    return args
+
+
+def main():
+    args = parse_arguments()
+
+    if args.fixture:
+        sailpoint_ids = load_fixture(args.fixture)
+    else:
+        source_id = os.environ.get('SAIL_OKTA_SOURCE_ID')
+        if not source_id:
+            # An empty source id matches nothing, which would read as zero entitlements
+            print("Error: SAIL_OKTA_SOURCE_ID is not set (or use --fixture with --state)", file=sys.stderr)
+            sys.exit(1)
+        filters = okta_group_filter(source_id)
+
+        configuration = Configuration()
+        configuration.experimental = True
+        configuration.suppress_experimental_warnings = True
+        configuration.connection_pool_maxsize = max(args.workers, configuration.connection_pool_maxsize or 0)
+
+        with ApiClient(configuration) as api_client:
+            api = EntitlementsApi(api_client)
+            try:
+                if args.state:
+                    sailpoint_ids = fetch_group_ids(api, filters, workers=args.workers)
+                elif args.stream:
+                    total = 0
+                    for entitlement in iter_entitlements(api, filters):
+                        print(entitlement.model_dump_json(by_alias=True))
+                        total += 1
+                    print(f"{total} Okta group entitlements", file=sys.stderr)
+                    return
+                else:
+                    print(count_entitlements(api, filters))
+                    return
 
-configuration = Configuration()
-configuration.experimental = True
-configuration.suppress_experimental_warnings = True
+            except Exception as e:
+                print("Exception when calling EntitlementsApi: %s\n" % e, file=sys.stderr)
+                sys.exit(1)
 
-with ApiClient(configuration) as api_client:
-    # Get all groups from Okta source
-    filters = 'source.id eq "" and type eq "group"'
+    with open(args.state, 'r') as f:
+        managed_ids = terraform_group_ids(json.load(f))
+    report = coverage(managed_ids, sailpoint_ids)
 
-    try:
-        results = Paginator.paginate(
-            EntitlementsApi(api_client).list_entitlements,
-            result_limit=99999,
-            filters=filters,
-        )
+    print(f"Terraform-managed Okta groups: {report['managed']}")
+    print(f"Sailpoint Okta group entitlements: {report['sailpoint']}")
+    print(f"Covered: {len(report['covered'])}, uncovered: {len(report['uncovered'])}, "
+          f"orphaned: {len(report['orphaned'])}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Coverage report written to {args.output}")
+    print(f"{report['percentage']}%")
 
-        print("The response of EntitlementsApi->list_entitlements:\n")
-        print(len(results))
-        # for item in results:
-        #     print(item.model_dump_json(by_alias=True, indent=4))
 
-    except Exception as e:
-        print("Exception when calling EntitlementsApi: %s\n" % e)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Terraform State Snapshots
+
+Serves `terraform show -json` for an environment directory from a local,
+compressed, content-addressed cache keyed by state lineage and serial, so
+tools that need the state (the Okta importer, tfstate_graph_parser.py, ad hoc
+scripts) share one export instead of each re-reading the backend.
+
+Usage:
+    uv run tf-snapshot <command> [--terraform=<mode>]
+
+Commands:
+    path   Print the path of the uncompressed snapshot JSON, for tools that
+           take a file (e.g. tfstate_graph_parser.py)
+    show   Write the snapshot JSON to stdout
+    check  Exit 0 if the stored snapshot is current, 1 if the state serial has
+           changed since (nothing is exported)
+
+With TF_CLOUD_ORGANIZATION, TF_WORKSPACE (or an initialized .terraform
+directory) and TF_TOKEN_APP_TERRAFORM_IO (or TF_TOKEN_app_terraform_io) set,
+the current serial is read from the HCP Terraform API, so an unchanged state
+costs one metadata request and no terraform process. Otherwise `terraform
+state pull` provides the serial, and a new snapshot is exported from that
+pulled state with `terraform show -json`.
+
+Snapshots are kept in .terraform-snapshots/ in the environment directory,
+which holds the newest five serials of each state lineage.
+
+Examples:
+    cd preview && uv run tf-snapshot check || echo "state changed"
+    cd preview && uv run python ../scripts/tfstate_graph_parser.py "$(uv run tf-snapshot path)"
+"""
+
+import sys
+import shutil
+import asyncio
+from pathlib import Path
+
+from ._terraform import TerraformRunner
+from ._snapshot import StateSnapshots
+
+COMMANDS = ("path", "show", "check")
+
+
+async def main() -> int:
+    args = sys.argv[1:]
+    mode = "docker"
+    for arg in [a for a in args if a.startswith("--terraform=")]:
+        mode = arg.split("=", 1)[1].strip().lower()
+        args.remove(arg)
+
+    if len(args) != 1 or args[0] not in COMMANDS:
+        print("Usage: uv run tf-snapshot {path|show|check} [--terraform=docker|native]", file=sys.stderr)
+        return 1 if args not in (["--help"], ["-h"]) else 0
+
+    directory = str(Path.cwd())
+    runner = TerraformRunner(directory, mode=mode)
+    snapshots = StateSnapshots(directory, runner)
+    try:
+        if args[0] == "check":
+            return 1 if await snapshots.changed() else 0
+
+        path = await snapshots.path()
+        if args[0] == "path":
+            print(path)
+        else:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, sys.stdout.buffer)
+        return 0
+    except Exception as e:  # noqa: BLE001
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        await runner.close()
+
+
+def cli_entry():
+    """Entry point for uv tool / pip install."""
+    sys.exit(asyncio.run(main()))
+
+
+if __name__ == "__main__":
+    cli_entry()
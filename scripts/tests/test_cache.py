@@ -0,0 +1,97 @@
+"""EntityCache high-water marks, resumed crawls and full reconciles."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.OktaTFImport._cache import EntityCache
+
+
+def _user(user_id, last_updated, **extra):
+    return {"type": "okta_user", "id": user_id, "name": user_id, "last_updated": last_updated, **extra}
+
+
+class EntityCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "cache.sqlite"
+        self.cache = EntityCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def crawl(self, pages, **begin):
+        """One complete crawl of users; returns (run, entities removed)."""
+        run = self.cache.begin("users", **begin)
+        for i, records in enumerate(pages, 1):
+            self.cache.add_page("users", records, run, f"c{i}" if i < len(pages) else None)
+        return run, self.cache.finish("users", run)
+
+    def ids(self):
+        return [r["id"] for r in self.cache.records("users")]
+
+    def test_first_crawl_is_full_and_sets_the_high_water_mark(self):
+        run, _ = self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z"), _user("u2", "2024-03-01T00:00:00.000Z")]])
+        self.assertTrue(run["full"])
+        self.assertIsNone(run["since"])
+
+        run = self.cache.begin("users")
+        self.assertFalse(run["full"])
+        self.assertEqual(run["since"], "2024-03-01T00:00:00.000Z")
+
+    def test_delta_crawl_keeps_unchanged_entities(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z"), _user("u2", "2024-03-01T00:00:00.000Z")]])
+        run, removed = self.crawl([[_user("u3", "2024-04-01T00:00:00.000Z")]])
+        self.assertFalse(run["full"])
+        self.assertEqual(removed, 0)
+        self.assertEqual(self.ids(), ["u1", "u2", "u3"])
+        self.assertEqual(self.cache.begin("users")["since"], "2024-04-01T00:00:00.000Z")
+
+    def test_empty_delta_crawl_keeps_the_high_water_mark(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z")]])
+        self.crawl([[]])
+        self.assertEqual(self.cache.begin("users")["since"], "2024-01-01T00:00:00.000Z")
+
+    def test_delta_crawl_drops_deleted_entities(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z"), _user("u2", "2024-01-01T00:00:00.000Z")]])
+        self.crawl([[_user("u2", "2024-02-01T00:00:00.000Z", deleted=True)]])
+        self.assertEqual(self.ids(), ["u1"])
+
+    def test_full_reconcile_drops_entities_not_seen(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z"), _user("u2", "2024-01-01T00:00:00.000Z")]])
+        run, removed = self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z")]], force_full=True)
+        self.assertTrue(run["full"])
+        self.assertEqual(removed, 1)
+        self.assertEqual(self.ids(), ["u1"])
+
+    def test_stale_reconcile_forces_a_full_crawl(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z")]])
+        with self.cache.db:
+            self.cache.db.execute("UPDATE checkpoints SET last_full = 0 WHERE kind = 'users'")
+        self.assertTrue(self.cache.begin("users")["full"])
+
+    def test_endpoints_without_delta_always_crawl_in_full(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z")]])
+        self.assertTrue(self.cache.begin("users", delta=False)["full"])
+
+    def test_interrupted_crawl_resumes_from_its_cursor(self):
+        self.crawl([[_user("u1", "2024-01-01T00:00:00.000Z"), _user("u2", "2024-01-01T00:00:00.000Z")]])
+        run = self.cache.begin("users", force_full=True)
+        self.cache.add_page("users", [_user("u1", "2024-01-01T00:00:00.000Z")], run, "c1")
+        self.cache.close()
+
+        # A new process picks up the same run where the last saved page left off
+        self.cache = EntityCache(self.path)
+        resumed = self.cache.begin("users")
+        self.assertEqual((resumed["run_id"], resumed["full"], resumed["cursor"]), (run["run_id"], True, "c1"))
+
+        self.cache.add_page("users", [_user("u3", "2024-02-01T00:00:00.000Z")], resumed, None)
+        # Entities from the page before the interruption count as seen by the full crawl
+        self.assertEqual(self.cache.finish("users", resumed), 1)
+        self.assertEqual(self.ids(), ["u1", "u3"])
+        self.assertIsNone(self.cache.begin("users")["cursor"])
+
+
+if __name__ == '__main__':
+    unittest.main()
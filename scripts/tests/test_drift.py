@@ -0,0 +1,61 @@
+"""DriftIndex against states that mix app resources with other okta_app_* types."""
+
+import unittest
+
+from scripts.OktaTFImport._drift import DriftIndex
+from scripts.OktaTFImport._applications import _existing_apps
+
+
+def _state(*resources):
+    return {"values": {"root_module": {"resources": [
+        {"address": f"{rtype}.{name}", "mode": "managed", "type": rtype, "name": name, "values": values}
+        for rtype, name, values in resources
+    ]}}}
+
+
+def _app(rtype, app_id, label, status="ACTIVE"):
+    return {"type": rtype, "id": app_id, "name": label.lower(), "attributes": {"label": label, "status": status}}
+
+
+class DriftIndexAppTypesTest(unittest.TestCase):
+    def setUp(self):
+        self.state = _state(
+            ("okta_app_saml", "hr", {"id": "0oa1", "label": "HR", "status": "ACTIVE"}),
+            ("okta_app_oauth", "portal", {"id": "0oa2", "label": "Portal", "status": "ACTIVE"}),
+            # Neighbouring okta_app_* types; settings share the app's id
+            ("okta_app_saml_app_settings", "hr", {"id": "0oa1", "settings": "{}"}),
+            ("okta_app_user", "hr_alice", {"id": "00u1", "app_id": "0oa1", "user_id": "00u1"}),
+            ("okta_app_group_assignments", "hr", {"id": "0oa1"}),
+            ("okta_app_oauth_api_scope", "portal", {"id": "0oa2", "scopes": ["okta.users.read"]}),
+            ("okta_app_signon_policy", "default", {"id": "rst1", "name": "Default"}),
+        )
+
+    def test_only_app_resource_types_are_indexed(self):
+        index = DriftIndex(self.state, _existing_apps)
+        self.assertEqual(set(index.resources), {("okta_app_saml", "0oa1"), ("okta_app_oauth", "0oa2")})
+
+    def test_clean_org_reports_no_drift(self):
+        index = DriftIndex(self.state, _existing_apps)
+        index.check([
+            _app("okta_app_saml", "0oa1", "HR"),
+            {"type": "okta_app_group_assignments", "id": "0oa1", "name": "hr"},
+            _app("okta_app_oauth", "0oa2", "Portal"),
+        ])
+        report = index.report()
+        self.assertEqual(report["managed"], 2)
+        self.assertEqual(report["unmanaged"], [])
+        self.assertEqual(report["deleted"], [])
+        self.assertEqual(report["modified"], [])
+
+    def test_same_id_under_another_type_is_not_a_match(self):
+        index = DriftIndex(self.state, _existing_apps)
+        index.check([_app("okta_app_bookmark", "0oa1", "HR bookmark"), _app("okta_app_oauth", "0oa2", "Portal v2")])
+        report = index.report()
+        self.assertEqual([r["id"] for r in report["unmanaged"]], ["0oa1"])
+        self.assertEqual([r["address"] for r in report["deleted"]], ["okta_app_saml.hr"])
+        self.assertEqual(report["modified"], [{"address": "okta_app_oauth.portal", "id": "0oa2",
+                                               "changes": {"label": {"state": "Portal", "live": "Portal v2"}}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+"""The importer CLI's startup import budget (see check_import_time.py)."""
+
+import unittest
+
+from scripts.check_import_time import import_profile, DEFAULT_MODULE, DEFAULT_BUDGET_MS, LAZY_PACKAGES
+
+# Fresh interpreters imported per check; the fastest is compared, as in the script
+RUNS = 3
+
+
+class ImportTimeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        profiles = [import_profile(DEFAULT_MODULE) for _ in range(RUNS)]
+        cls.total, cls.children, cls.modules = min(profiles, key=lambda p: p[0])
+
+    def test_sdk_is_imported_lazily(self):
+        loaded = sorted({m.split(".")[0] for m in self.modules} & set(LAZY_PACKAGES))
+        self.assertEqual(loaded, [])
+
+    def test_import_time_is_within_budget(self):
+        slowest = ", ".join(f"{name} {cumulative / 1000:.1f} ms"
+                            for cumulative, name in sorted(self.children, reverse=True)[:5])
+        self.assertLessEqual(self.total / 1000, DEFAULT_BUDGET_MS, f"slowest imports: {slowest}")
+
+
+if __name__ == '__main__':
+    unittest.main()
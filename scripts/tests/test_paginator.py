@@ -0,0 +1,130 @@
+"""OktaPaginator retries and cursor handling against stub list endpoints."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from scripts.OktaTFImport import _paginator
+from scripts.OktaTFImport._paginator import OktaPaginator
+
+
+class Clock:
+    """Stands in for the paginator's time module; sleeping advances it instantly."""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class StubResponse:
+    def __init__(self, status, headers):
+        self.status = status
+        self.headers = headers
+
+    def get_headers(self):
+        return self.headers
+
+    def get_status(self):
+        return self.status
+
+
+class StubError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+class StubEndpoint:
+    """A list endpoint serving pages by `after` cursor, failing as scripted.
+
+    failures maps a cursor (None for the first page) to the statuses returned
+    for it, in order, before the page is served.
+    """
+
+    def __init__(self, clock: Clock, pages: list[list], failures: dict | None = None):
+        self.clock = clock
+        self.pages = pages
+        self.failures = {k: list(v) for k, v in (failures or {}).items()}
+        self.requests = []
+
+    async def __call__(self, query_params):
+        after = query_params.get("after")
+        self.requests.append(after)
+        if self.failures.get(after):
+            status = self.failures[after].pop(0)
+            headers = {"X-Rate-Limit-Remaining": "0", "X-Rate-Limit-Reset": str(self.clock.time() + 30)}
+            return None, StubResponse(status, headers), StubError(status, headers if status == 429 else {})
+
+        number = int(after[1:]) if after else 0
+        headers = {}
+        if number + 1 < len(self.pages):
+            headers["Link"] = f'<https://example.okta.com/api/v1/users?after=c{number + 1}&limit=2>; rel="next"'
+        return self.pages[number], StubResponse(200, headers), None
+
+
+class OktaPaginatorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        for patcher in (mock.patch.object(_paginator, "time", self.clock),
+                        mock.patch.object(_paginator.asyncio, "sleep", self.clock.sleep)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.paginator = OktaPaginator(None, max_retries=3)
+
+    def collect(self, endpoint, after=None):
+        async def run():
+            return [page async for page in self.paginator.pages(endpoint, "users", 2, after=after)]
+        return asyncio.run(run())
+
+    def test_follows_the_next_link(self):
+        endpoint = StubEndpoint(self.clock, [["u1", "u2"], ["u3", "u4"], ["u5"]])
+        self.assertEqual(self.collect(endpoint), [(["u1", "u2"], "c1"), (["u3", "u4"], "c2"), (["u5"], None)])
+        self.assertEqual(endpoint.requests, [None, "c1", "c2"])
+
+    def test_failed_page_is_retried_from_its_own_cursor(self):
+        endpoint = StubEndpoint(self.clock, [["u1"], ["u2"], ["u3"]], failures={"c1": [503, 500]})
+        pages = self.collect(endpoint)
+        self.assertEqual([items for items, _ in pages], [["u1"], ["u2"], ["u3"]])
+        self.assertEqual(endpoint.requests, [None, "c1", "c1", "c1", "c2"])
+        self.assertEqual(self.paginator.metrics.requests["users"]["retries"], 2)
+        self.assertEqual(self.paginator.metrics.requests["users"]["errors"], 2)
+
+    def test_rate_limited_page_waits_for_the_reset(self):
+        endpoint = StubEndpoint(self.clock, [["u1"]], failures={None: [429]})
+        self.assertEqual(self.collect(endpoint), [(["u1"], None)])
+        # The 429 carries X-Rate-Limit-Reset 30s out, which beats exponential backoff
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertGreaterEqual(self.clock.sleeps[0], 30)
+        self.assertEqual(self.paginator.metrics.requests["users"]["rate_limit_waits"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        endpoint = StubEndpoint(self.clock, [["u1"]], failures={None: [502] * 10})
+        with self.assertRaisesRegex(Exception, r"after 4 attempt"):
+            self.collect(endpoint)
+        self.assertEqual(len(endpoint.requests), 4)
+
+    def test_client_errors_are_not_retried(self):
+        endpoint = StubEndpoint(self.clock, [["u1"]], failures={None: [404]})
+        with self.assertRaisesRegex(Exception, r"after 1 attempt"):
+            self.collect(endpoint)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_resumes_from_a_saved_cursor(self):
+        endpoint = StubEndpoint(self.clock, [["u1"], ["u2"], ["u3"]])
+        self.assertEqual(self.collect(endpoint, after="c1"), [(["u2"], "c2"), (["u3"], None)])
+        self.assertEqual(endpoint.requests, ["c1", "c2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""OktaTFImport writing import files from streamed pages."""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.OktaTFImport import OktaTFImport
+from scripts.OktaTFImport._state import StateIndex
+from scripts.OktaTFImport._checkpoint import ImportCheckpoint
+from scripts.OktaTFImport._utils import ImportNamer
+from scripts.OktaTFImport._waves import read_import_blocks
+from scripts.OktaTFImport._users import _existing_users
+from scripts.OktaTFImport._applications import _existing_apps
+
+
+def _state(*resources):
+    return {"values": {"root_module": {"resources": [
+        {"address": f"{rtype}.{name}", "mode": "managed", "type": rtype, "name": name, "values": values}
+        for rtype, name, values in resources
+    ]}}}
+
+
+def _users(*user_ids):
+    return [{"type": "okta_user", "id": user_id, "name": user_id} for user_id in user_ids]
+
+
+def _getter(pages, fail_at=None, calls=None):
+    """A fetcher yielding pages, as (records, next cursor), from the given cursor on.
+
+    With fail_at, fetching that page (0-based) raises instead; calls collects
+    the cursor of every crawl started.
+    """
+    async def getter(paginator=None, after=None):
+        if calls is not None:
+            calls.append(after)
+        start = int(after) if after else 0
+        for number, records in enumerate(pages[start:], start + 1):
+            if number - 1 == fail_at:
+                raise Exception("Failed to retrieve users: HTTP 503 (after 6 attempt(s))")
+            yield records, str(number) if number < len(pages) else None
+    return getter
+
+
+class RegisterTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name)
+        OktaTFImport._instance = None
+        self.okta = OktaTFImport(str(self.directory), {})
+
+    def tearDown(self):
+        OktaTFImport._instance = None
+        self._tmp.cleanup()
+
+    def use_state(self, state):
+        self.okta.index = StateIndex(state)
+        self.okta.namer = ImportNamer(self.okta.index.names())
+
+    def register(self, name, pages, existing_fn, **getter):
+        asyncio.run(self.okta._register(name, _getter(pages, **getter), existing_fn))
+        output_file = self.directory / f"{name}.import.tf"
+        return read_import_blocks(output_file) if output_file.exists() else None
+
+    def test_skip_is_per_resource_type(self):
+        # The app is managed, its group assignments (imported under the same id) are not
+        self.use_state(_state(("okta_app_saml", "hr", {"id": "0oa1", "label": "HR"})))
+        blocks = self.register("apps", [[
+            {"type": "okta_app_saml", "id": "0oa1", "name": "hr"},
+            {"type": "okta_app_group_assignments", "id": "0oa1", "name": "hr"},
+        ]], _existing_apps)
+        self.assertEqual([(a.split(".")[0], i) for a, i in blocks.items()],
+                         [("okta_app_group_assignments", "0oa1")])
+        self.assertEqual(self.okta.metrics.types["apps"]["skipped"], 1)
+
+    def test_interrupted_import_resumes_from_the_checkpoint(self):
+        pages = [_users("u1", "u2"), _users("u3"), _users("u4", "u5")]
+        self.assertIsNone(self.register("users", pages, _existing_users, fail_at=2))
+        self.assertEqual(self.okta.failed, {"users"})
+
+        checkpoint = ImportCheckpoint(self.directory, "users")
+        self.assertTrue(checkpoint.load())
+        self.assertEqual((checkpoint.cursor, checkpoint.written), ("2", 3))
+        partial_file = self.directory / "users.import.tf.partial"
+        self.assertEqual(partial_file.stat().st_size, checkpoint.offset)
+
+        # Blocks written after the last checkpoint (a crash mid-page) are truncated away
+        with open(partial_file, 'a') as f:
+            f.write('import {\n  to = okta_user.u4_torn\n  id = "u4"\n}\n\n')
+
+        calls = []
+        blocks = self.register("users", pages, _existing_users, calls=calls)
+        self.assertEqual(calls, ["2"])
+        self.assertEqual(sorted(blocks.values()), ["u1", "u2", "u3", "u4", "u5"])
+        self.assertEqual(len(blocks), 5)
+        self.assertFalse(partial_file.exists())
+        self.assertFalse(checkpoint.path.exists())
+
+    def test_checkpoint_without_partial_file_starts_over(self):
+        ImportCheckpoint(self.directory, "users").save("2", 3, 0, 120)
+        calls = []
+        blocks = self.register("users", [_users("u1"), _users("u2")], _existing_users, calls=calls)
+        self.assertEqual(calls, [None])
+        self.assertEqual(sorted(blocks.values()), ["u1", "u2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
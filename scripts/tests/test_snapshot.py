@@ -0,0 +1,98 @@
+"""StateSnapshots export, reuse and retention with a stub terraform runner."""
+
+import json
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts._snapshot import StateSnapshots, SnapshotStore, KEEP_SERIALS
+from scripts._terraform import TerraformRunner
+
+
+def _show(serial: int) -> dict:
+    return {"format_version": "1.0", "values": {"root_module": {"resources": [
+        {"address": "okta_group.g", "mode": "managed", "type": "okta_group", "name": "g",
+         "values": {"id": f"00g{serial}", "name": "app_role"}},
+    ], "child_modules": []}}}
+
+
+class StubRunner(TerraformRunner):
+    """Answers `state pull` and `show -json <file>` from an in-memory state."""
+
+    def __init__(self, directory: str):
+        super().__init__(directory, mode="native")
+        self.serial = 1
+        self.calls = []
+
+    async def run(self, *args, workdir=None, stdout=None):
+        self.calls.append(args[:2])
+        if args[:2] == ("state", "pull"):
+            output = {"version": 4, "serial": self.serial, "lineage": "L1", "resources": [{"type": "okta_group"}]}
+        elif args[:2] == ("show", "-json"):
+            # A pulled state file must exist, inside the environment directory
+            pulled = Path(self.directory) / args[2] if len(args) > 2 else None
+            output = _show(json.loads(pulled.read_text())["serial"] if pulled else self.serial)
+        else:
+            return 1, b"", f"unexpected command {args}"
+        stdout.write(json.dumps(output).encode())
+        return 0, b"", ""
+
+
+class StateSnapshotsTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.runner = StubRunner(self.directory)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def load(self):
+        return asyncio.run(StateSnapshots(self.directory, self.runner).load())
+
+    def snapshot_files(self):
+        return sorted(p.name for p in (Path(self.directory) / ".terraform-snapshots").rglob("*") if p.is_file())
+
+    def test_export_is_stored_and_reused(self):
+        self.assertEqual(self.load(), _show(1))
+        self.assertEqual(self.runner.calls, [("state", "pull"), ("show", "-json")])
+
+        self.runner.calls.clear()
+        self.assertEqual(self.load(), _show(1))
+        self.assertEqual(self.runner.calls, [("state", "pull")])
+        # Only the index and one compressed object are left behind
+        self.assertEqual(len(self.snapshot_files()), 2)
+
+    def test_api_version_skips_state_pull(self):
+        snapshots = StateSnapshots(self.directory, self.runner)
+        snapshots._remote_version_sync = lambda: ("L1", self.runner.serial)
+        self.assertEqual(asyncio.run(snapshots.load()), _show(1))
+        self.assertEqual(self.runner.calls, [("show", "-json")])
+
+        self.runner.calls.clear()
+        asyncio.run(snapshots.load())
+        self.assertEqual(self.runner.calls, [])
+
+    def test_path_writes_one_uncompressed_copy(self):
+        snapshots = StateSnapshots(self.directory, self.runner)
+        path = asyncio.run(snapshots.path())
+        self.assertEqual(json.loads(path.read_text()), _show(1))
+
+    def test_old_serials_are_pruned(self):
+        paths = []
+        for serial in range(1, KEEP_SERIALS + 3):
+            self.runner.serial = serial
+            paths.append(asyncio.run(StateSnapshots(self.directory, self.runner).path()))
+
+        store = SnapshotStore(Path(self.directory))
+        self.assertEqual(sorted(int(k.split("/")[1]) for k in store.index["snapshots"]),
+                         list(range(3, KEEP_SERIALS + 3)))
+        self.assertEqual(len(list(store.objects.glob("*.json.gz"))), KEEP_SERIALS)
+        # Only the newest serial keeps its uncompressed copy
+        self.assertEqual([p for p in paths if p.exists()], paths[-1:])
+        self.assertEqual(store.load(store.lookup("L1", 3)), _show(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""WaveManifest update / emit / apply cycle."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from collections import Counter
+
+from scripts.OktaTFImport._waves import WaveManifest, read_import_blocks
+
+
+def _blocks(source, resource_type, count, start=0):
+    return {f"{resource_type}.r{i:03d}": {"id": f"id{i:03d}", "source": source} for i in range(start, start + count)}
+
+
+class WaveManifestTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name)
+        self.pending = {**_blocks("groups", "okta_group", 4), **_blocks("users", "okta_user", 10)}
+        self.managed = set()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def run_importer(self, sources=("groups", "users"), target_seconds=None):
+        """One importer run: reconcile with what is not yet in state, emit, save, reload."""
+        manifest = WaveManifest(self.directory, target_seconds)
+        blocks = {a: e for a, e in self.pending.items() if a not in self.managed and e["source"] in sources}
+        manifest.update(blocks, list(sources), self.managed)
+        wave = manifest.emit(self.managed)
+        manifest.save()
+        return WaveManifest(self.directory), wave
+
+    def apply(self, wave):
+        self.managed.update(wave["imports"])
+
+    def wave_files(self):
+        return sorted(p.name for p in self.directory.glob("okta-wave-*.import.tf"))
+
+    def test_waves_are_sized_to_the_target(self):
+        manifest, wave = self.run_importer(target_seconds=2)
+        # 14 imports at the default 0.5s each, at most 4 per wave
+        self.assertEqual([len(w["imports"]) for w in manifest.waves], [4, 4, 4, 2])
+        self.assertEqual(wave["wave"], 1)
+        self.assertEqual(self.wave_files(), ["okta-wave-001.import.tf"])
+        self.assertEqual(read_import_blocks(self.directory / "okta-wave-001.import.tf"),
+                         {a: e["id"] for a, e in wave["imports"].items()})
+        self.assertEqual(wave["generated"], "generated-wave-001.tf")
+
+    def test_rerun_before_apply_keeps_the_emitted_wave(self):
+        _, first = self.run_importer(target_seconds=2)
+        content = (self.directory / first["file"]).read_text()
+        manifest, again = self.run_importer()
+        self.assertEqual(again["wave"], 1)
+        self.assertEqual(again["imports"], first["imports"])
+        self.assertEqual((self.directory / first["file"]).read_text(), content)
+        self.assertEqual(manifest.target_seconds, 2)
+
+    def test_applied_waves_are_skipped_until_done(self):
+        manifest, wave = self.run_importer(target_seconds=2)
+        seen = []
+        while wave:
+            seen.append(wave["wave"])
+            self.apply(wave)
+            manifest, wave = self.run_importer()
+            self.assertTrue(all(w["status"] == "applied" for w in manifest.waves if w["wave"] in seen))
+        self.assertEqual(seen, [1, 2, 3, 4])
+        self.assertEqual(self.wave_files(), [])
+        applied = set().union(*(w["imports"] for w in manifest.waves))
+        self.assertEqual(applied, set(self.pending))
+
+    def test_unemitted_waves_are_repacked_with_measured_cost(self):
+        manifest, wave = self.run_importer(target_seconds=2)
+        self.assertEqual(sorted({e["source"] for e in wave["imports"].values()}), ["groups"])
+        self.assertEqual([len(w["imports"]) for w in manifest.waves[1:]], [4, 4, 2])
+
+        manifest.record_plan(0.5, Counter({"okta_user": 4}))
+        manifest.save()
+        self.assertEqual(manifest.cost("okta_user"), 0.125)
+        self.apply(wave)
+        manifest, wave = self.run_importer()
+        # At 0.125s per user, the remaining users fit in a single wave
+        self.assertEqual(wave["wave"], 2)
+        self.assertEqual([len(w["imports"]) for w in manifest.waves if w["status"] == "pending"], [10])
+
+    def test_objects_deleted_in_okta_drop_out_of_the_emitted_wave(self):
+        _, wave = self.run_importer(target_seconds=2)
+        gone = sorted(wave["imports"])[0]
+        del self.pending[gone]
+        _, again = self.run_importer()
+        self.assertNotIn(gone, again["imports"])
+        self.assertNotIn(gone, read_import_blocks(self.directory / again["file"]))
+
+    def test_failed_sources_keep_their_pending_entries(self):
+        _, wave = self.run_importer(target_seconds=2)
+        self.apply(wave)
+        manifest, _ = self.run_importer(sources=("groups",))
+        pending = set().union(*(w["imports"] for w in manifest.waves if w["status"] == "pending"))
+        self.assertEqual(pending, set(_blocks("users", "okta_user", 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
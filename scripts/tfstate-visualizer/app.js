@@ -3,8 +3,19 @@
  *
  * Main application logic for visualizing Terraform state files
  * using Sigma.js for network graph rendering.
+ *
+ * The graph comes either from graph-data.js (window.GRAPH_DATA, written by
+ * tfstate_graph_parser.py) or, under `tfstate_graph_parser.py serve`, from the
+ * server's API (window.GRAPH_SERVER): an overview is loaded first and
+ * neighborhoods and search results are fetched as they are needed.
  */
 
+// Nodes in the initial overview when querying the graph server
+const OVERVIEW_LIMIT = 300;
+// Hops fetched around a node picked from the search results
+const SEARCH_DEPTH = 2;
+const SEARCH_DEBOUNCE_MS = 200;
+
 class TerraformGraphVisualizer {
     constructor() {
         this.graph = null;
@@ -15,6 +26,13 @@ class TerraformGraphVisualizer {
         this.searchResults = [];
         this.showLabels = true;
 
+        // Graph server (tfstate_graph_parser.py serve), if the page is served by it
+        this.api = window.GRAPH_SERVER ? window.GRAPH_SERVER.api : null;
+        this.remoteResults = new Map();
+        this.expandedNodes = new Set();
+        this.searchTimer = null;
+        this.searchSequence = 0;
+
         // DOM elements
         this.elements = {
             graph: document.getElementById('graph'),
@@ -30,6 +48,7 @@ class TerraformGraphVisualizer {
             infoPanel: document.getElementById('info-panel'),
             minimap: document.getElementById('minimap'),
             minimapCanvas: document.getElementById('minimap-canvas'),
+            typeFilter: document.getElementById('type-filter'),
         };
 
         // State
@@ -44,7 +63,11 @@ class TerraformGraphVisualizer {
     async init() {
         try {
             // Load graph data
-            this.loadGraphData();
+            if (this.api) {
+                await this.loadFromServer();
+            } else {
+                this.loadGraphData();
+            }
 
             // Initialize the graph
             this.initializeGraph();
@@ -81,25 +104,127 @@ class TerraformGraphVisualizer {
         document.getElementById('tf-version').textContent = `Terraform: ${this.graphData.metadata.terraform_version}`;
     }
 
+    async loadFromServer() {
+        const [metadata, overview] = await Promise.all([
+            this.fetchGraph('meta'),
+            this.fetchGraph('overview', { limit: OVERVIEW_LIMIT }),
+        ]);
+        this.graphData = { metadata, nodes: overview.nodes, edges: overview.edges };
+
+        document.getElementById('tf-version').textContent = `Terraform: ${metadata.terraform_version}`;
+        this.buildTypeFilter(metadata.resource_types);
+    }
+
+    async fetchGraph(endpoint, params = {}) {
+        const query = new URLSearchParams();
+        for (const [key, value] of Object.entries(params)) {
+            if (value !== undefined && value !== null && value !== '') {
+                query.set(key, value);
+            }
+        }
+        const type = this.elements.typeFilter.value;
+        if (type && endpoint !== 'meta') {
+            query.set('type', type);
+        }
+
+        const response = await fetch(`${this.api}/${endpoint}?${query}`);
+        if (!response.ok) {
+            throw new Error(`Graph server ${endpoint} request failed: ${response.status}`);
+        }
+        return response.json();
+    }
+
+    buildTypeFilter(resourceTypes) {
+        const options = Object.entries(resourceTypes)
+            .sort((a, b) => b[1] - a[1])
+            .map(([type, count]) => `<option value="${type}">${type} (${count})</option>`)
+            .join('');
+        this.elements.typeFilter.innerHTML = `<option value="">All types</option>${options}`;
+        this.elements.typeFilter.style.display = 'block';
+    }
+
+    updateStats() {
+        const { metadata } = this.graphData;
+        document.getElementById('node-count').textContent =
+            `Nodes: ${this.graph.order} of ${metadata.resource_count}`;
+        document.getElementById('edge-count').textContent =
+            `Edges: ${this.graph.size} of ${metadata.dependency_count}`;
+    }
+
+    addNode(node, x, y) {
+        this.graph.addNode(node.id, {
+            label: node.label,
+            size: node.size,
+            color: node.color,
+            type: 'circle',
+            resourceType: node.type,
+            mode: node.mode,
+            address: node.address,
+            provider: node.provider,
+            attributes: node.attributes,
+            x,
+            y,
+        });
+    }
+
+    mergeSubgraph(subgraph, centerId) {
+        // New nodes are placed in a ring around the node they were fetched for
+        const centerNode = subgraph.nodes.find(node => node.id === centerId);
+        if (centerNode && !this.graph.hasNode(centerId)) {
+            this.addNode(centerNode, 0, 0);
+        }
+        const center = this.graph.hasNode(centerId) ? this.graph.getNodeAttributes(centerId) : { x: 0, y: 0 };
+        const added = subgraph.nodes.filter(node => !this.graph.hasNode(node.id));
+        added.forEach((node, i) => {
+            const angle = (2 * Math.PI * i) / added.length;
+            const radius = 0.15 + 0.05 * Math.random();
+            this.addNode(node, center.x + radius * Math.cos(angle), center.y + radius * Math.sin(angle));
+        });
+
+        subgraph.edges.forEach(edge => {
+            if (this.graph.hasNode(edge.source) && this.graph.hasNode(edge.target)) {
+                this.graph.mergeEdge(edge.source, edge.target, {
+                    size: edge.size || 1,
+                    color: '#475569',
+                    type: 'arrow',
+                });
+            }
+        });
+
+        this.updateStats();
+        this.buildLegend();
+        this.renderer.refresh();
+    }
+
+    async expandNode(nodeId, depth = 1) {
+        if (!this.api || this.expandedNodes.has(`${nodeId}:${depth}`)) {
+            return;
+        }
+        try {
+            const subgraph = await this.fetchGraph('neighborhood', { id: nodeId, depth });
+            this.expandedNodes.add(`${nodeId}:${depth}`);
+            this.mergeSubgraph(subgraph, nodeId);
+        } catch (error) {
+            this.showError(error.message);
+        }
+    }
+
+    async reloadOverview() {
+        this.expandedNodes.clear();
+        this.graph.clear();
+        const overview = await this.fetchGraph('overview', { limit: OVERVIEW_LIMIT });
+        this.mergeSubgraph(overview);
+        this.applyLayout();
+        this.renderer.refresh();
+    }
+
     initializeGraph() {
         // Create a new graph
         this.graph = new graphology.Graph();
 
         // Add nodes
         this.graphData.nodes.forEach(node => {
-            this.graph.addNode(node.id, {
-                label: node.label,
-                size: node.size,
-                color: node.color,
-                type: 'circle',
-                resourceType: node.type,
-                mode: node.mode,
-                address: node.address,
-                provider: node.provider,
-                attributes: node.attributes,
-                x: Math.random() * 100,
-                y: Math.random() * 100,
-            });
+            this.addNode(node, Math.random() * 100, Math.random() * 100);
         });
 
         // Add edges
@@ -127,6 +252,10 @@ class TerraformGraphVisualizer {
             labelWeight: '500',
             labelColor: { color: '#F1F5F9' },
         });
+
+        if (this.api) {
+            this.updateStats();
+        }
     }
 
     applyLayout() {
@@ -160,8 +289,13 @@ class TerraformGraphVisualizer {
         });
 
         // Click events
-        this.renderer.on('clickNode', ({ node }) => {
+        this.renderer.on('clickNode', async ({ node }) => {
             this.selectNode(node);
+            if (this.api) {
+                // Pull in the node's neighbors that are not loaded yet
+                await this.expandNode(node);
+                this.selectNode(node);
+            }
         });
 
         this.renderer.on('clickStage', () => {
@@ -189,6 +323,16 @@ class TerraformGraphVisualizer {
             this.clearSearch();
         });
 
+        this.elements.typeFilter.addEventListener('change', async () => {
+            this.clearSearch();
+            this.deselectNode();
+            try {
+                await this.reloadOverview();
+            } catch (error) {
+                this.showError(error.message);
+            }
+        });
+
         // Control buttons
         document.getElementById('reset-view').addEventListener('click', () => {
             this.resetView();
@@ -447,6 +591,12 @@ class TerraformGraphVisualizer {
             return;
         }
 
+        if (this.api) {
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.searchServer(query), SEARCH_DEBOUNCE_MS);
+            return;
+        }
+
         const lowerQuery = query.toLowerCase();
         this.searchResults = [];
 
@@ -466,7 +616,23 @@ class TerraformGraphVisualizer {
         this.displaySearchResults();
     }
 
-    displaySearchResults() {
+    async searchServer(query) {
+        // Only the response to the latest query is shown
+        const sequence = ++this.searchSequence;
+        try {
+            const result = await this.fetchGraph('search', { q: query });
+            if (sequence !== this.searchSequence) {
+                return;
+            }
+            this.remoteResults = new Map(result.nodes.map(node => [node.id, node]));
+            this.searchResults = result.nodes.map(node => node.id);
+            this.displaySearchResults(result.total);
+        } catch (error) {
+            this.showError(error.message);
+        }
+    }
+
+    displaySearchResults(total = this.searchResults.length) {
         if (this.searchResults.length === 0) {
             this.elements.searchResults.style.display = 'none';
             this.clearHighlight();
@@ -474,11 +640,16 @@ class TerraformGraphVisualizer {
         }
 
         // Update count
-        this.elements.searchCount.textContent = `${this.searchResults.length} result${this.searchResults.length !== 1 ? 's' : ''}`;
+        this.elements.searchCount.textContent = total > this.searchResults.length
+            ? `${this.searchResults.length} of ${total} results`
+            : `${total} result${total !== 1 ? 's' : ''}`;
 
         // Build results list
         const items = this.searchResults.map(nodeId => {
-            const attrs = this.graph.getNodeAttributes(nodeId);
+            const remote = this.remoteResults.get(nodeId);
+            const attrs = remote
+                ? { label: remote.label, resourceType: remote.type, mode: remote.mode }
+                : this.graph.getNodeAttributes(nodeId);
             return `
                 <div class="search-result-item" data-node="${nodeId}">
                     <div class="search-result-label">${attrs.label}</div>
@@ -492,8 +663,14 @@ class TerraformGraphVisualizer {
 
         // Add click handlers
         this.elements.searchList.querySelectorAll('.search-result-item').forEach(item => {
-            item.addEventListener('click', () => {
+            item.addEventListener('click', async () => {
                 const nodeId = item.getAttribute('data-node');
+                if (this.api) {
+                    await this.expandNode(nodeId, SEARCH_DEPTH);
+                    if (!this.graph.hasNode(nodeId)) {
+                        return;
+                    }
+                }
                 this.focusOnNode(nodeId);
                 this.selectNode(nodeId);
             });
@@ -531,6 +708,9 @@ class TerraformGraphVisualizer {
     clearSearch() {
         this.elements.searchInput.value = '';
         this.searchResults = [];
+        this.remoteResults.clear();
+        this.searchSequence++;
+        clearTimeout(this.searchTimer);
         this.elements.searchResults.style.display = 'none';
 
         // Restore node sizes
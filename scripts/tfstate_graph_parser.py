@@ -9,14 +9,32 @@ that can be visualized using sigma.js. The graph includes:
 
 Usage:
     python tfstate_graph_parser.py <path_to_tfstate> [output_dir]
+    python tfstate_graph_parser.py serve <path_to_tfstate> [--port 8000] [--host 127.0.0.1]
+
+`serve` keeps the parsed graph in memory in an indexed form and serves the
+visualizer from a local HTTP server. Instead of loading the whole graph up
+front, the page requests an overview and then fetches neighborhoods and
+search results on demand, so large states open as quickly as small ones.
 """
 
 import json
 import sys
 import re
+import bisect
+import argparse
+from array import array
 from pathlib import Path
 from typing import Dict, List, Set, Tuple, Any
 from collections import defaultdict
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Upper bounds on what one query returns, so a response stays small enough to render
+MAX_DEPTH = 3
+NODE_LIMIT = 500
+SEARCH_LIMIT = 50
+OVERVIEW_LIMIT = 300
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
 
 
 class TerraformStateParser:
@@ -324,10 +342,275 @@ class TerraformStateParser:
         print(f"Resource types: {list(graph_data['metadata']['resource_types'].keys())}")
 
 
+def _provider_name(provider: str) -> str:
+    """Short provider name ("okta") from a provider address or provider[...] reference."""
+    return provider.rstrip('"]').rsplit('/', 1)[-1] if provider else ''
+
+
+def _non_negative(query: Dict, name: str, default: int) -> int:
+    """Integer query parameter; a negative value would get past the response caps."""
+    value = int(query.get(name, [str(default)])[0])
+    if value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return value
+
+
+def _split_values(values: List[str]) -> Set[str]:
+    """Query parameter values, accepting both repeated and comma-separated forms."""
+    return {v for value in values for v in value.split(',') if v}
+
+
+class GraphIndex:
+    """Compact, query-ready form of a parsed graph.
+
+    Nodes are numbered; each node is kept as its pre-serialized JSON alongside
+    small integer arrays for its type and provider. Edges are stored as
+    compressed sparse rows in both directions, so neighbors are a slice of an
+    array. Text search uses an inverted index from address/name tokens to
+    node numbers, with the sorted vocabulary giving prefix matches by bisection.
+    """
+
+    def __init__(self, graph_data: Dict):
+        nodes = graph_data['nodes']
+        self.ids = [node['id'] for node in nodes]
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.addresses = [node['address'].lower() for node in nodes]
+        self.node_json = [json.dumps(node, separators=(',', ':')).encode() for node in nodes]
+
+        self.type_names = sorted({node['type'] for node in nodes})
+        self.provider_names = sorted({_provider_name(node['provider']) for node in nodes})
+        type_ids = {name: i for i, name in enumerate(self.type_names)}
+        provider_ids = {name: i for i, name in enumerate(self.provider_names)}
+        self.types = array('H', (type_ids[node['type']] for node in nodes))
+        self.providers = array('H', (provider_ids[_provider_name(node['provider'])] for node in nodes))
+
+        pairs = [(self.index[e['source']], self.index[e['target']]) for e in graph_data['edges']]
+        self.out_offsets, self.out_targets = self._rows(len(nodes), pairs)
+        self.in_offsets, self.in_sources = self._rows(len(nodes), [(t, s) for s, t in pairs])
+        self.by_degree = sorted(range(len(nodes)), key=lambda n: -self.degree(n))
+
+        postings = defaultdict(set)
+        for i, node in enumerate(nodes):
+            text = ' '.join(str(v) for v in (
+                node['address'], node['label'], node['type'],
+                node['attributes'].get('id'), node['attributes'].get('name')) if v)
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                postings[token].add(i)
+        self.vocabulary = sorted(postings)
+        self.postings = {token: array('I', sorted(ids)) for token, ids in postings.items()}
+
+        self.metadata = dict(graph_data['metadata'])
+        providers = defaultdict(int)
+        for p in self.providers:
+            providers[self.provider_names[p]] += 1
+        self.metadata['providers'] = dict(providers)
+
+    @staticmethod
+    def _rows(count: int, pairs: List[Tuple[int, int]]) -> Tuple[array, array]:
+        offsets = array('I', [0] * (count + 1))
+        for source, _ in pairs:
+            offsets[source + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        targets = array('I', [0] * len(pairs))
+        fill = array('I', offsets[:-1])
+        for source, target in pairs:
+            targets[fill[source]] = target
+            fill[source] += 1
+        return offsets, targets
+
+    def degree(self, n: int) -> int:
+        return (self.out_offsets[n + 1] - self.out_offsets[n]) + (self.in_offsets[n + 1] - self.in_offsets[n])
+
+    def neighbors(self, n: int):
+        yield from self.out_targets[self.out_offsets[n]:self.out_offsets[n + 1]]
+        yield from self.in_sources[self.in_offsets[n]:self.in_offsets[n + 1]]
+
+    def _filter(self, types: Set[str], providers: Set[str]):
+        """Return a predicate over node numbers for the type/provider filters."""
+        type_ids = {i for i, name in enumerate(self.type_names) if name in types}
+        provider_ids = {i for i, name in enumerate(self.provider_names) if name in providers}
+        return lambda n: ((not types or self.types[n] in type_ids)
+                          and (not providers or self.providers[n] in provider_ids))
+
+    def subgraph(self, selected: List[int], truncated: bool = False) -> bytes:
+        """Serialize nodes and the edges between them in the graph-data format."""
+        chosen = set(selected)
+        edges = []
+        # An edge's position in the outgoing rows is its id, so ids are stable across queries
+        for source in selected:
+            for e in range(self.out_offsets[source], self.out_offsets[source + 1]):
+                target = self.out_targets[e]
+                if target in chosen:
+                    edges.append({'id': f"e{e}", 'source': self.ids[source], 'target': self.ids[target],
+                                  'type': 'arrow', 'size': 2})
+        return (b'{"nodes":[' + b','.join(self.node_json[n] for n in selected) + b'],"edges":'
+                + json.dumps(edges, separators=(',', ':')).encode()
+                + b',"truncated":' + (b'true' if truncated else b'false') + b'}')
+
+    def overview(self, limit: int = OVERVIEW_LIMIT, types: Set[str] = frozenset(),
+                 providers: Set[str] = frozenset()) -> bytes:
+        """The best-connected nodes, as a starting view."""
+        matches = self._filter(types, providers)
+        selected = []
+        for n in self.by_degree:
+            if matches(n):
+                if len(selected) == limit:
+                    return self.subgraph(selected, truncated=True)
+                selected.append(n)
+        return self.subgraph(selected)
+
+    def neighborhood(self, node_id: str, depth: int = 1, types: Set[str] = frozenset(),
+                     providers: Set[str] = frozenset(), limit: int = NODE_LIMIT) -> bytes:
+        """Nodes within `depth` hops of node_id, in either direction.
+
+        Traversal goes through every node; the filters only decide which of the
+        reached nodes are returned (the root always is). Nearer nodes come first
+        and at most `limit` nodes are returned.
+        """
+        root = self.index[node_id]
+        matches = self._filter(types, providers)
+        seen = {root}
+        selected = [root]
+        frontier = [root]
+        for _ in range(min(depth, MAX_DEPTH)):
+            next_frontier = []
+            for n in frontier:
+                for m in self.neighbors(n):
+                    if m in seen:
+                        continue
+                    if matches(m):
+                        if len(selected) == limit:
+                            return self.subgraph(selected, truncated=True)
+                        selected.append(m)
+                    seen.add(m)
+                    next_frontier.append(m)
+            frontier = next_frontier
+        return self.subgraph(selected)
+
+    def search(self, query: str, types: Set[str] = frozenset(), providers: Set[str] = frozenset(),
+               limit: int = SEARCH_LIMIT) -> bytes:
+        """Nodes whose indexed tokens start with every token of the query."""
+        matches = self._filter(types, providers)
+        found = None
+        for token in TOKEN_PATTERN.findall(query.lower()):
+            ids = set()
+            i = bisect.bisect_left(self.vocabulary, token)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(token):
+                ids.update(self.postings[self.vocabulary[i]])
+                i += 1
+            found = ids if found is None else found & ids
+            if not found:
+                break
+
+        query = query.strip().lower()
+        ranked = sorted((n for n in found or () if matches(n)),
+                        key=lambda n: (self.addresses[n] != query, len(self.addresses[n]), self.addresses[n]))
+        results = ranked[:limit]
+        return (b'{"nodes":[' + b','.join(self.node_json[n] for n in results) + b'],"total":'
+                + str(len(ranked)).encode() + b'}')
+
+
+class GraphRequestHandler(SimpleHTTPRequestHandler):
+    """Serves the visualizer files and the /api/ graph queries."""
+
+    def log_message(self, format, *args):  # noqa: A002
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}).encode())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/graph-data.js':
+            # Tells app.js to query the server instead of reading window.GRAPH_DATA
+            self._send(200, b'window.GRAPH_SERVER = {"api": "/api"};\n', 'application/javascript')
+            return
+        if not url.path.startswith('/api/'):
+            super().do_GET()
+            return
+
+        graph = self.server.graph
+        query = parse_qs(url.query)
+        filters = {'types': _split_values(query.get('type', [])),
+                   'providers': _split_values(query.get('provider', []))}
+        try:
+            limit = _non_negative(query, 'limit', 0)
+            match url.path[len('/api/'):]:
+                case 'meta':
+                    body = json.dumps(graph.metadata).encode()
+                case 'overview':
+                    body = graph.overview(min(limit or OVERVIEW_LIMIT, NODE_LIMIT), **filters)
+                case 'neighborhood':
+                    node_id = query.get('id', [''])[0]
+                    if node_id not in graph.index:
+                        self._error(404, f"Unknown node: {node_id}")
+                        return
+                    depth = _non_negative(query, 'depth', 1)
+                    body = graph.neighborhood(node_id, depth, limit=min(limit or NODE_LIMIT, NODE_LIMIT), **filters)
+                case 'search':
+                    body = graph.search(query.get('q', [''])[0], limit=min(limit or SEARCH_LIMIT, NODE_LIMIT),
+                                        **filters)
+                case _:
+                    self._error(404, f"Unknown endpoint: {url.path}")
+                    return
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        self._send(200, body)
+
+
+class GraphServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, graph: GraphIndex, directory: Path, verbose: bool = False):
+        super().__init__(address, lambda *args: GraphRequestHandler(*args, directory=str(directory)))
+        self.graph = graph
+        self.verbose = verbose
+
+
+def serve(argv: List[str]):
+    """Parse a state file and serve the visualizer with on-demand graph queries."""
+    parser = argparse.ArgumentParser(prog='tfstate_graph_parser.py serve',
+                                     description='Serve the state visualizer with on-demand graph queries')
+    parser.add_argument('tfstate', help='terraform show -json or terraform state pull output')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--directory', type=Path, default=Path(__file__).parent / 'tfstate-visualizer',
+                        help='visualizer directory to serve')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    graph = GraphIndex(TerraformStateParser(args.tfstate).generate_graph_data())
+    server = GraphServer((args.host, args.port), graph, args.directory, verbose=args.verbose)
+    print(f"Indexed {len(graph.ids)} nodes, {len(graph.out_targets)} edges")
+    print(f"Serving the visualizer on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 def main():
     """Main entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve(sys.argv[2:])
+        return
+
     if len(sys.argv) < 2:
         print("Usage: python tfstate_graph_parser.py <path_to_tfstate> [output_dir]")
+        print("       python tfstate_graph_parser.py serve <path_to_tfstate> [--port 8000]")
         sys.exit(1)
 
     tfstate_path = sys.argv[1]
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Terraform State Projection
+
+Streams `terraform show -json` state or plan output and keeps only what the
+apply comment prints: resources of the types listed under `outputs` in
+.terraform-ci.yaml, at the changed addresses, with only the listed
+attributes. The result is a small JSON table for the comment renderer:
+
+    {
+      "columns": {"okta_user": ["id", "login"]},
+      "rows": [{"address": "okta_user.alice", "type": "okta_user", "values": {"id": "00u1", "login": "alice"}}]
+    }
+
+For a plan, every row also has an `action` (create, update, delete or
+replace). Rows come only from resource changes that are not no-op or read,
+and attributes still unknown before apply are marked "(known after apply)".
+For a state, `--console` limits rows to the resources with a completion line
+in the apply log, the same rule the renderer uses. `--address` limits them
+further.
+
+The input is read in chunks. Each resource is decoded on its own and dropped
+once projected, and everything else (planned values, prior state,
+configuration) is stepped over without being decoded, so memory stays bounded
+by the largest single resource rather than the whole document.
+
+Usage:
+    python tfstate_projection.py <show.json|-> [--config .terraform-ci.yaml] [--console tf.console.txt]
+                                 [--address <addr>]... [--output outputs.json]
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+CHUNK_SIZE = 1 << 20
+UNKNOWN = "(known after apply)"
+# Same completion lines the comment renderer looks for
+COMPLETION_PATTERN = re.compile(
+    r'^(?P<addr>\S[^:]*):\s+(?:Creation complete|Modifications complete|Destruction complete)')
+SKIPPED_ACTIONS = (["no-op"], ["read"])
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Everything up to the next bracket outside a string; stops at a string cut off by the chunk end
+_SKIP_RUN = re.compile(r'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+
+class JsonStream:
+    """Pull parser over a JSON text that is read in chunks.
+
+    `object_items()` and `array_items()` walk containers one entry at a time;
+    the caller consumes each entry with `value()` (decode it), `skip()` (step
+    over it without building it) or another nested walk. Only the unread
+    part of the current chunk and the value being decoded are held in memory.
+    """
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was already consumed."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} but found {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value in full."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number running up to the end of the chunk may continue in the next one
+            if (isinstance(value, (int, float)) and _NUMBER_TAIL.match(self.buf, end).end() == len(self.buf)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        """Step over the next value without building it."""
+        if self._peek() not in '{[':
+            self.value()
+            return
+
+        depth = 0
+        while True:
+            self.pos = _SKIP_RUN.match(self.buf, self.pos).end()
+            if self.pos == len(self.buf) or self.buf[self.pos] == '"':
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON input")
+                continue
+
+            char = self.buf[self.pos]
+            self.pos += 1
+            if char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def object_items(self) -> Iterator[str]:
+        """Yield the keys of the next object; the caller consumes each value."""
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' but found {char!r}")
+
+    def array_items(self) -> Iterator[None]:
+        """Yield once per element of the next array; the caller consumes each element."""
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self._peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' but found {char!r}")
+
+
+def _entries(stream: JsonStream, load_entry) -> Optional[List]:
+    """Decode an array one entry at a time with load_entry (null stays None)."""
+    if stream._peek() != '[':
+        return stream.value()
+    return [load_entry(stream) for _ in stream.array_items()]
+
+
+def _load_module(stream: JsonStream) -> Optional[Dict]:
+    if stream._peek() != '{':
+        return stream.value()
+    module = {}
+    for key in stream.object_items():
+        if key == 'resources':
+            module[key] = _entries(stream, JsonStream.value)
+        elif key == 'child_modules':
+            module[key] = _entries(stream, _load_module)
+        else:
+            module[key] = stream.value()
+    return module
+
+
+def _load_values(stream: JsonStream) -> Optional[Dict]:
+    if stream._peek() != '{':
+        return stream.value()
+    return {key: _load_module(stream) if key == 'root_module' else stream.value() for key in stream.object_items()}
+
+
+def load_document(f) -> Dict:
+    """Decode `terraform show -json` (or `terraform state pull`) output read from f in chunks.
+
+    The result is the same as json.load(f), but resources are decoded one at
+    a time, so the text of the document is never held in memory whole.
+    """
+    stream = JsonStream(f)
+    document = {}
+    for key in stream.object_items():
+        if key in ('values', 'planned_values'):
+            document[key] = _load_values(stream)
+        elif key == 'prior_state' and stream._peek() == '{':
+            document[key] = {k: _load_values(stream) if k == 'values' else stream.value()
+                             for k in stream.object_items()}
+        elif key in ('resources', 'resource_changes', 'resource_drift'):
+            document[key] = _entries(stream, JsonStream.value)
+        else:
+            document[key] = stream.value()
+    return document
+
+
+def _parse_outputs_section(text: str) -> Dict[str, List[str]]:
+    """Read the `outputs` mapping without PyYAML.
+
+    Understands the block and flow list forms used in .terraform-ci.yaml:
+        okta_user:
+          - id
+        okta_group: [id, name]
+    """
+    outputs = {}
+    current = None
+    in_outputs = False
+    for line in text.splitlines():
+        stripped = line.split('#', 1)[0].rstrip()
+        if not stripped:
+            continue
+        if not line[0].isspace():
+            in_outputs = stripped == 'outputs:'
+            continue
+        if not in_outputs:
+            continue
+
+        content = stripped.strip()
+        if content.startswith('- ') and current is not None:
+            outputs[current].append(content[2:].strip().strip('\'"'))
+        elif ':' in content:
+            key, _, rest = content.partition(':')
+            current = key.strip().strip('\'"')
+            rest = rest.strip()
+            if rest.startswith('[') and rest.endswith(']'):
+                outputs[current] = [v.strip().strip('\'"') for v in rest[1:-1].split(',') if v.strip()]
+            else:
+                outputs[current] = []
+        else:
+            raise ValueError(f"Unsupported line in outputs section: {line!r}")
+    return outputs
+
+
+def load_outputs_config(path: Path) -> Dict[str, List[str]]:
+    """Return the `outputs` section of .terraform-ci.yaml ({} if the file does not exist)."""
+    if not path.exists():
+        return {}
+    text = path.read_text(encoding='utf-8')
+    try:
+        import yaml
+    except ImportError:
+        outputs = _parse_outputs_section(text)
+    else:
+        outputs = (yaml.safe_load(text) or {}).get('outputs') or {}
+
+    if not isinstance(outputs, dict):
+        raise ValueError(f"'outputs' in {path} must be a mapping")
+    return {rtype: list(attrs) for rtype, attrs in outputs.items() if attrs}
+
+
+def completed_addresses(console_text: str) -> Set[str]:
+    """Addresses with a Creation/Modifications/Destruction complete line in an apply log."""
+    return {m.group('addr').strip() for m in map(COMPLETION_PATTERN.match, console_text.splitlines()) if m}
+
+
+class Projection:
+    """Collects rows for the configured types from a state or plan stream."""
+
+    def __init__(self, columns: Dict[str, List[str]], addresses: Optional[Set[str]] = None):
+        self.columns = columns
+        self.addresses = addresses
+        self.rows = []
+
+    def _wanted(self, resource: Dict) -> bool:
+        if resource.get('mode', 'managed') != 'managed':
+            return False
+        if resource.get('type') not in self.columns:
+            return False
+        return self.addresses is None or resource.get('address') in self.addresses
+
+    def _resource(self, resource: Dict):
+        """One entry of a module's `resources`."""
+        if self._wanted(resource):
+            attributes = self.columns[resource['type']]
+            values = resource.get('values') or {}
+            self.rows.append({
+                'address': resource['address'],
+                'type': resource['type'],
+                'values': {a: values.get(a) for a in attributes},
+            })
+
+    def _module(self, stream: JsonStream):
+        for key in stream.object_items():
+            if key == 'resources':
+                # Each resource is decoded whole and dropped once projected
+                for _ in stream.array_items():
+                    self._resource(stream.value())
+            elif key == 'child_modules':
+                for _ in stream.array_items():
+                    self._module(stream)
+            else:
+                stream.skip()
+
+    def _resource_change(self, resource: Dict):
+        """One entry of a plan's `resource_changes`."""
+        change = resource.get('change') or {}
+        actions = change.get('actions', [])
+        if actions in SKIPPED_ACTIONS or not self._wanted(resource):
+            return
+
+        if actions == ['delete']:
+            action, values = 'delete', change.get('before') or {}
+        else:
+            action = 'replace' if 'delete' in actions else actions[0] if actions else 'update'
+            values = change.get('after') or {}
+        unknown = change.get('after_unknown') or {} if action != 'delete' else {}
+
+        attributes = self.columns[resource['type']]
+        self.rows.append({
+            'address': resource['address'],
+            'type': resource['type'],
+            'action': action,
+            'values': {a: UNKNOWN if unknown.get(a) is True else values.get(a) for a in attributes},
+        })
+
+    def read(self, stream: JsonStream):
+        """Walk `terraform show -json` output: state `values`, or plan `resource_changes`."""
+        for key in stream.object_items():
+            if key == 'values':
+                for values_key in stream.object_items():
+                    if values_key == 'root_module':
+                        self._module(stream)
+                    else:
+                        stream.skip()
+            elif key == 'resource_changes':
+                for _ in stream.array_items():
+                    self._resource_change(stream.value())
+            else:
+                stream.skip()
+
+    def table(self) -> Dict:
+        return {'columns': self.columns, 'rows': self.rows}
+
+
+def project(f, columns: Dict[str, List[str]], addresses: Optional[Set[str]] = None) -> Dict:
+    """Project a state or plan JSON file object to the configured outputs table."""
+    projection = Projection(columns, addresses)
+    if columns:
+        projection.read(JsonStream(f))
+    return projection.table()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Project terraform show -json output to the apply comment outputs")
+    parser.add_argument('input', help="terraform show -json state or plan output ('-' for stdin)")
+    parser.add_argument('--config', type=Path, default=Path('.terraform-ci.yaml'),
+                        help="file with the outputs section (default: .terraform-ci.yaml)")
+    parser.add_argument('--console', type=Path,
+                        help="apply log; only resources with a completion line are kept")
+    parser.add_argument('--address', action='append', help="only keep this address (repeatable)")
+    parser.add_argument('--output', type=Path, help="write the table here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point."""
+    args = parse_arguments()
+    columns = load_outputs_config(args.config)
+
+    addresses = None
+    if args.console:
+        addresses = completed_addresses(args.console.read_text(encoding='utf-8', errors='replace'))
+    if args.address:
+        addresses = set(args.address) if addresses is None else addresses & set(args.address)
+
+    if args.input == '-':
+        table = project(sys.stdin, columns, addresses)
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            table = project(f, columns, addresses)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(table, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(table, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,9 @@ Usage: uv run terraform.py [terraform_arguments...]
 This script performs the following preprocessing before running terraform:
 1. Validates current directory has a Terraform {} block in it
 2. Consolidates all .tf files from subdirectories into a single temporary file
-3. Passes all arguments to terraform command
+3. Optionally checks okta_group names against the {app-name}_{role-name}
+   standard (set TERRAFORM_WRAPPER_NAME_CHECK=1)
+4. Passes all arguments to terraform command
 
 Examples:
   cd preview
@@ -20,6 +22,7 @@ Examples:
 
 import json
 import os
+import re
 import sys
 import subprocess
 import shutil
@@ -28,6 +31,15 @@ from pathlib import Path
 # Global constants
 CONSOLIDATED_FILE = "_consolidated.tf"
 SOURCE_MAP_FILE = "_consolidated_source_map.json"
+NAME_CHECK_ENV = "TERRAFORM_WRAPPER_NAME_CHECK"
+
+# Same rule as policy/group_name_standard.rego: {app-name}_{role-name}
+GROUP_NAME_PATTERN = re.compile(r"^[^ _]+_[^ _]+$")
+GROUP_RESOURCE_PATTERN = re.compile(r'^\s*resource\s+"okta_group"\s+"([^"]+)"\s*\{')
+NAME_ATTRIBUTE_PATTERN = re.compile(r'^\s*name\s*=\s*"((?:[^"\\]|\\.)*)"\s*(?:(?:#|//).*)?$')
+# A one-line block, `resource "okta_group" "x" { name = "..." }`, holds its single attribute after the `{`
+INLINE_NAME_ATTRIBUTE_PATTERN = re.compile(r'\s*name\s*=\s*"((?:[^"\\]|\\.)*)"\s*\}')
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
 
 def log_info(message):
     """Print an info message"""
@@ -92,12 +104,82 @@ def find_terraform_executable():
         sys.exit(1)
     return terraform_bin
 
-def consolidate_tf_files():
+class GroupNameCheck:
+    """Streaming check of okta_group names, fed one line at a time.
+
+    Tracks whether the current line is inside a `resource "okta_group"` block
+    and checks its top-level `name` attribute. Names built from interpolation
+    cannot be evaluated here and are left to the Trivy policy.
+    """
+
+    def __init__(self):
+        self.violations = []  # list of (line number, resource name, group name)
+        self._resource = None
+        self._depth = 0
+
+    def _check_name(self, match, line_number):
+        if match and "${" not in match.group(1) and not GROUP_NAME_PATTERN.match(match.group(1)):
+            self.violations.append((line_number, self._resource, match.group(1)))
+
+    def feed(self, line, line_number):
+        if self._resource is None:
+            match = GROUP_RESOURCE_PATTERN.match(line)
+            if not match:
+                return
+            self._resource = match.group(1)
+            self._depth = 0
+            self._check_name(INLINE_NAME_ATTRIBUTE_PATTERN.match(line, match.end()), line_number)
+        elif self._depth == 1:
+            self._check_name(NAME_ATTRIBUTE_PATTERN.match(line), line_number)
+
+        code = re.split(r"#|//", STRING_PATTERN.sub('""', line), maxsplit=1)[0]
+        self._depth += code.count("{") - code.count("}")
+        if self._depth <= 0:
+            self._resource = None
+
+def resolve_source_line(source_map, consolidated_line):
+    """Map a line number in the consolidated file back to (source file, line)."""
+    for entry in source_map:
+        start = entry["consolidated_start"]
+        if start <= consolidated_line < start + entry["line_count"]:
+            return entry["source_file"], consolidated_line - start + 1
+    return CONSOLIDATED_FILE, consolidated_line
+
+def check_group_names(current_dir, source_map, consolidated_check):
+    """Report okta_group naming violations; returns True if there are none.
+
+    consolidated_check holds the violations found while consolidating, which
+    are mapped back to their source files. Files in the current directory
+    are not consolidated, so they are checked here directly.
+    """
+    violations = [(*resolve_source_line(source_map, line), resource, name)
+                  for line, resource, name in consolidated_check.violations]
+
+    for tf_file in sorted(current_dir.glob("*.tf")):
+        if tf_file.name == CONSOLIDATED_FILE:
+            continue
+        check = GroupNameCheck()
+        with open(tf_file, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                check.feed(line, line_number)
+        violations.extend((tf_file.name, line, resource, name) for line, resource, name in check.violations)
+
+    for source_file, line, resource, name in violations:
+        log_error(f"{source_file}:{line}: okta_group.{resource}: Group name does not meet standards: {name}")
+    if violations:
+        log_info("Group names must be {app-name}_{role-name}: no spaces and only one underscore")
+    return not violations
+
+def consolidate_tf_files(name_check=None):
     """Find all .tf files in subdirectories, consolidate them, and write a source map.
 
     The source map (SOURCE_MAP_FILE) records which line ranges in the consolidated
     file correspond to which original source files so that CI can map formatting
     errors back to the correct file and line number.
+
+    If a GroupNameCheck is given, every source line is fed to it as it is
+    consolidated, with its line number in the consolidated file. Returns
+    (file count, source map).
     """
     log_info(f"Consolidating .tf files from subdirectories into {CONSOLIDATED_FILE}...")
 
@@ -135,6 +217,10 @@ def consolidate_tf_files():
             all_lines.extend(source_lines)
             all_lines.append("")  # blank line after each file
 
+            if name_check:
+                for offset, line in enumerate(source_lines):
+                    name_check.feed(line, content_start + offset)
+
             source_map.append({
                 "consolidated_start": content_start,
                 "source_file": str(rel_path).replace("\\", "/"),
@@ -156,11 +242,13 @@ def consolidate_tf_files():
 
     log_info(f"Consolidated {file_count} files into {CONSOLIDATED_FILE}")
     log_info(f"Source map written to {SOURCE_MAP_FILE}")
-    return file_count
+    return file_count, source_map
 
-def is_allowed_terraform_cmd(cmd):
-    """List of allowed terraform commands"""
-    return cmd in ["init", "fmt", "validate", "plan", "apply", "show", "plan-light"]
+def is_allowed_terraform_cmd(args):
+    """List of allowed terraform commands, plus read-only `state pull`"""
+    if args[:2] == ["state", "pull"]:
+        return True
+    return args[0] in ["init", "fmt", "validate", "plan", "apply", "show", "plan-light"]
 
 def discover_changed_targets(terraform_bin):
     """Run a JSON-mode plan and return the list of changed resource addresses.
@@ -224,7 +312,7 @@ def run_plan_light(args, terraform_bin):
 
 def run_terraform(args):
     """Run terraform with the provided arguments"""
-    if not is_allowed_terraform_cmd(args[0]):
+    if not is_allowed_terraform_cmd(args):
         log_error(f"Command {args[0]} is not allowed")
         return 1
 
@@ -264,12 +352,17 @@ def main():
         # Step 3: Clean up existing files
         cleanup_existing_files()
         
-        # Step 4: Consolidate .tf files
-        consolidate_tf_files()
-        
-        # Step 5: Run terraform
-        terraform_args = sys.argv[1:]  # All arguments except script name
-        exit_code = run_terraform(terraform_args)
+        # Step 4: Consolidate .tf files, checking group names as they are read
+        name_check = GroupNameCheck() if os.environ.get(NAME_CHECK_ENV) == "1" else None
+        _, source_map = consolidate_tf_files(name_check)
+
+        # Step 5: Fail on naming violations before terraform starts
+        if name_check and not check_group_names(Path.cwd(), source_map, name_check):
+            exit_code = 1
+        else:
+            # Step 6: Run terraform
+            terraform_args = sys.argv[1:]  # All arguments except script name
+            exit_code = run_terraform(terraform_args)
         
     except KeyboardInterrupt:
         log_info("Operation cancelled by user")